@@ -0,0 +1,239 @@
+"""Замеры конвейера данных дашборда на синтетической замене Oracle.
+
+Запуск из корня проекта (webapp/config.py не нужен, все настройки
+пишутся во временный файл WEBAPP_SETTINGS):
+
+    python benchmarks/pipeline.py --objects 3 --meters 10 --months 2
+
+Базовые результаты зависят от машины, поэтому в репозитории их нет:
+сохраните их до изменений и сравнивайте на той же машине после.
+
+    python benchmarks/pipeline.py --save /tmp/baseline.json
+    python benchmarks/pipeline.py --compare /tmp/baseline.json
+
+Для каждого этапа (выборка, получасовое преобразование, свертки,
+сериализация, построение графика, запись xlsx, таблица последних данных)
+печатается медиана нескольких прогонов и пиковая память Python одного
+прогона (tracemalloc, отдельно от замеров времени). Этапы с суффиксом _legacy повторяют
+прежний код callback'ов и служат точкой отсчета. С --compare время
+сравнивается с сохраненным и при замедлении больше чем на --tolerance
+скрипт завершается с кодом 1.
+"""
+import argparse
+from datetime import datetime
+from io import BytesIO, StringIO
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DICT_CONVERT_TO_HALFHOUR = {str(i + 1): '{:02d}:{:02d}'.format(i // 2, 30 * (i % 2)) for i in range(48)}
+
+
+def legacy_to_timeseries(df):
+    df['N_INTER_RAS'] = df['N_INTER_RAS'].astype(str).replace(DICT_CONVERT_TO_HALFHOUR)
+    df['DD_MM_YYYY'] = df['DD_MM_YYYY'].astype(str)
+    df['date'] = pd.to_datetime(df['DD_MM_YYYY'] + ' ' + df['N_INTER_RAS'])
+    del df['DD_MM_YYYY']
+    del df['N_INTER_RAS']
+    return df
+
+
+def legacy_rollups(df):
+    return (df.groupby(['N_SH', pd.Grouper(key='date', freq='D')])['VAL'].sum().reset_index(),
+            df.groupby(['N_SH', pd.Grouper(key='date', freq='H')])['VAL'].sum().reset_index(),
+            df.groupby(['N_SH', pd.Grouper(key='date', freq='30min')])['VAL'].sum().reset_index())
+
+
+def legacy_json_roundtrip(frames):
+    payload = json.dumps({'df_{}'.format(i + 1): frame.to_json(orient='split', date_format='iso')
+                          for i, frame in enumerate(frames)})
+    datasets = json.loads(payload)
+    pd.read_json(StringIO(datasets['df_1']), orient='split', convert_dates=True)
+    pd.read_json(StringIO(datasets['df_3']), orient='split', convert_dates=True)
+    return len(payload)
+
+
+def legacy_xlsx(template_path, df):
+    import openpyxl
+    df_h = df.set_index('date').resample('H')['VAL'].sum()
+    wb = openpyxl.load_workbook(template_path)
+    ws = wb.active
+    for r_idx, (_, row) in enumerate(df_h.groupby(df_h.index.day), 10):
+        for c_idx, value in enumerate(row, 2):
+            ws.cell(row=r_idx, column=c_idx, value=value)
+    wb.save(BytesIO())
+
+
+def legacy_last_day(df_table_dt):
+    def days(n):
+        forms = ['день', 'дня', 'дней']
+        if n % 10 == 1 and n % 100 != 11:
+            p = 0
+        elif 2 <= n % 10 <= 4 and (n % 100 < 10 or n % 100 >= 20):
+            p = 1
+        else:
+            p = 2
+        return str(n) + ' ' + forms[p]
+
+    def convert_timedelta(dt):
+        resolution = ['days', 'hours', 'minutes', 'seconds']
+        to_show = {comp: getattr(dt.components, comp) for comp in resolution}
+        return "{} {hours:02d} ч.".format(days(to_show['days']), **to_show)
+
+    df_table_dt = df_table_dt.copy()
+    df_table_dt['Дней нет данных'] = (datetime.now() - df_table_dt['DT']).apply(convert_timedelta)
+    return df_table_dt.to_dict('records')
+
+
+def month_figure(frame, number_counter):
+    import plotly.graph_objs as go
+    return go.Figure(
+        data=[go.Bar(x=frame['date'].tolist(), y=frame['VAL'].tolist(), name='Расход')],
+        layout=go.Layout(yaxis={'type': 'log'}, title='Счетчик № {}'.format(number_counter)))
+
+
+def make_template(path):
+    import openpyxl
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws['A1'] = 'Почасовой расход электроэнергии'
+    ws.merge_cells('A1:Y1')
+    for hour in range(24):
+        ws.cell(row=9, column=2 + hour, value='{:02d}:00'.format(hour))
+    for day in range(31):
+        ws.cell(row=10 + day, column=1, value=day + 1)
+    wb.save(path)
+
+
+def timeit(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def peak_kib(func):
+    """Пиковая память Python (КиБ) одного вызова func; отдельно от замеров времени."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def run_stages(args, template_path):
+    """Медианы времени и пиковая память этапов; вызывается в контексте приложения."""
+    from webapp.energy import queries
+    from webapp.energy.reference import staleness
+    from webapp.energy.reports import report_renderer
+    from webapp.energy.series import HalfHourSeries, split_by_meter
+    from webapp.energy.store import dataset_store
+
+    n_ob, n_sh, month = 1, '1001', '2018-09'
+    columns = queries.fetch_month_intervals(n_ob, n_sh, month)
+    frame = pd.DataFrame({'DD_MM_YYYY': columns[0], 'N_INTER_RAS': columns[1], 'VAL': columns[2], 'N_SH': n_sh})
+    converted = legacy_to_timeseries(frame.copy())
+    series = HalfHourSeries.for_month(month, *columns, meter=n_sh)
+    object_columns = queries.fetch_object_month_intervals(n_ob, month)
+    feeders = [(meter, meter, item) for meter, item in split_by_meter(month, *object_columns).items()]
+    last_day = queries.fetch_all_last_day()
+    report_renderer.snapshot()
+
+    stages = [
+        ('fetch_month', lambda: queries.fetch_month_intervals(n_ob, n_sh, month)),
+        ('fetch_month_daily', lambda: queries.fetch_month_daily(n_ob, n_sh, month)),
+        ('fetch_object_month', lambda: queries.fetch_object_month_intervals(n_ob, month)),
+        ('halfhour_legacy', lambda: legacy_to_timeseries(frame.copy())),
+        ('halfhour_series', lambda: HalfHourSeries.for_month(month, *columns, meter=n_sh)),
+        ('rollups_legacy', lambda: legacy_rollups(converted)),
+        ('rollups_series', lambda: (series.daily(), series.hourly(), series.to_frame('D'))),
+        ('json_legacy', lambda: legacy_json_roundtrip(legacy_rollups(converted))),
+        ('dataset_store', lambda: dataset_store.get(dataset_store.put(series))),
+        ('figure_month', lambda: month_figure(series.to_frame('D'), n_sh)),
+        ('xlsx_legacy', lambda: legacy_xlsx(template_path, converted)),
+        ('xlsx_renderer', lambda: report_renderer.render_month(series)),
+        ('xlsx_object', lambda: report_renderer.render_object(feeders)),
+        ('last_day_legacy', lambda: legacy_last_day(last_day)),
+        ('last_day_vectorized', lambda: staleness(last_day['DT'], datetime.now())),
+    ]
+    results = {name: timeit(func, args.repeat) for name, func in stages}
+    peaks = {name: peak_kib(func) for name, func in stages}
+    return results, peaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--objects', type=int, default=3)
+    parser.add_argument('--meters', type=int, default=10)
+    parser.add_argument('--months', type=int, default=2)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--save', help='записать результаты в json')
+    parser.add_argument('--compare', help='сравнить с сохраненными результатами')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='допустимое замедление (доля)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='webapp-bench-')
+    db_path = os.path.join(workdir, 'fake.sqlite')
+    template_path = os.path.join(workdir, 'template.xlsx')
+    settings_path = os.path.join(workdir, 'settings.py')
+    with open(settings_path, 'w') as f:
+        f.write('ORACLE_FAKE_DB = {!r}\n'.format(db_path))
+        f.write('REPORT_TEMPLATE_PATH = {!r}\n'.format(template_path))
+        f.write('REPORT_CACHE_DIR = None\n')
+        f.write('MIRROR_DIR = None\n')
+        # все, что иначе берется из webapp/config.py: замеры не зависят от локального конфига
+        f.write('SECRET_KEY = {!r}\n'.format('benchmark'))
+        f.write('SQLALCHEMY_DATABASE_URI = {!r}\n'.format('sqlite:///' + os.path.join(workdir, 'webapp.db')))
+        f.write('SQLALCHEMY_TRACK_MODIFICATIONS = False\n')
+        f.write('USER_NAME = PASSWORD = ORACLE_DSN = {!r}\n'.format('fake'))
+    os.environ['WEBAPP_SETTINGS'] = settings_path
+    sys.path.insert(0, ROOT)
+
+    from webapp import create_app
+    from webapp.energy import fake
+
+    fake.build(db_path, args.objects, args.meters, args.months)
+    make_template(template_path)
+    # пул, кэши и рендерер настраиваются в create_app; фоновые потоки замерам мешают
+    app = create_app(dashboard=True, background=False)
+    with app.app_context():
+        results, peaks = run_stages(args, template_path)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    regressions = []
+    print('{:<22} {:>12} {:>12} {:>8} {:>12}'.format('этап', 'мс', 'было, мс', 'x', 'пик, КиБ'))
+    for name, seconds in results.items():
+        before = baseline.get(name)
+        ratio = seconds / before if before else None
+        mark = ''
+        if ratio is not None and ratio > 1 + args.tolerance:
+            regressions.append(name)
+            mark = '  <-- медленнее'
+        print('{:<22} {:>12.3f} {:>12} {:>8} {:>12.1f}{}'.format(
+            name, seconds * 1000, '{:.3f}'.format(before * 1000) if before else '-',
+            '{:.2f}'.format(ratio) if ratio else '-', peaks[name], mark))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'params': vars(args), 'results': results, 'peak_kib': peaks}, f, indent=2, ensure_ascii=False)
+    if regressions:
+        print('Замедлились этапы: {}'.format(', '.join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,7 @@ from webapp import create_app
 from webapp.db import db
 from webapp.user.models import User
 
-app = create_app()
+app = create_app(dashboard=False, background=False)
 
 with app.app_context():
     username = input('Введите имя пользователя: ')
@@ -0,0 +1,23 @@
+"""news published index
+
+Revision ID: 3a9c5e2f71d4
+Revises: 76fec3c4083b
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3a9c5e2f71d4'
+down_revision = '76fec3c4083b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_news_published_id', 'news', ['published', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_news_published_id', table_name='news')
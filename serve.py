@@ -0,0 +1,123 @@
+"""Запуск приложения в продакшене на waitress.
+
+    python serve.py --port 5000 --threads 8
+
+Процесс перед приемом запросов прогревается (webapp.health.warm_up).
+
+Дашборд работает только в одном процессе: наборы данных (dataset_store),
+задачи отчетов (report_jobs) и их статусы хранятся в памяти процесса, и
+запрос, попавший в другой процесс, их не найдет. Поэтому с дашбордом
+масштабируется только --threads, а --workers > 1 отклоняется. Без дашборда
+(WEBAPP_DASHBOARD=0 или DASHBOARD_ENABLED = False) родитель может открыть
+сокет и запустить рабочие процессы через fork; приложение создается
+(create_app) уже в каждом из них. Упавший рабочий процесс перезапускается,
+SIGTERM/SIGINT завершают все.
+
+Если прогрев не удался (например, Oracle недоступен), процесс все равно
+принимает запросы, /ready отвечает 503, а прогрев повторяется каждые
+--warm-up-retry секунд.
+"""
+import argparse
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+from waitress import serve
+
+logger = logging.getLogger('webapp.serve')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Запуск webapp на waitress')
+    parser.add_argument('--host', default=os.environ.get('WEBAPP_HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.environ.get('WEBAPP_PORT', 5000)))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEBAPP_THREADS', 8)),
+                        help='потоков waitress в каждом процессе')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEBAPP_WORKERS', 1)),
+                        help='рабочих процессов (больше 1 - только без дашборда и там, где есть fork)')
+    parser.add_argument('--warm-up-retry', type=int, default=30,
+                        help='пауза между повторами неудачного прогрева, с')
+    return parser.parse_args()
+
+
+def run_worker(args, sock):
+    from webapp import create_app
+    from webapp.health import warm_up
+
+    app = create_app()
+    if not warm_up(app):
+        def retry():
+            while True:
+                time.sleep(args.warm_up_retry)
+                if warm_up(app):
+                    return
+        threading.Thread(target=retry, name='warm-up', daemon=True).start()
+    serve(app, sockets=[sock], threads=args.threads, ident='webapp')
+
+
+def spawn(args, sock):
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            run_worker(args, sock)
+        finally:
+            os._exit(1)
+    return pid
+
+
+def supervise(args, sock):
+    workers = set(spawn(args, sock) for _ in range(args.workers))
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            logger.warning('Рабочий процесс %s завершился (статус %s), перезапуск', pid, status)
+            time.sleep(1)
+            workers.add(spawn(args, sock))
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(process)d %(levelname)s %(name)s: %(message)s')
+    if args.workers > 1:
+        from webapp import dashboard_enabled, load_config
+        if dashboard_enabled(load_config()):
+            sys.exit('--workers > 1 несовместим с дашбордом: его состояние хранится в памяти '
+                     'процесса; используйте --threads или отключите дашборд (WEBAPP_DASHBOARD=0)')
+        if not hasattr(os, 'fork'):
+            sys.exit('--workers > 1 требует fork; используйте --threads')
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(1024)
+    if args.workers > 1:
+        supervise(args, sock)
+    else:
+        run_worker(args, sock)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+from datetime import date, datetime
+
+import pytest
+
+from webapp.energy import data
+from webapp.energy.data import MonthView, RangeView
+from webapp.energy.series import HalfHourSeries
+
+
+def october_series():
+    return HalfHourSeries.for_month('2018-10', [datetime(2018, 10, 3)], [1], [2.0], meter='1001')
+
+
+@pytest.fixture
+def no_oracle(monkeypatch):
+    def fail(*args):
+        raise AssertionError('не должно быть запроса суток')
+    monkeypatch.setattr(data, 'load_day_series', fail)
+
+
+def test_stale_click_after_month_change_full(no_oracle):
+    view = MonthView(1, '1001', '2018-10', series=october_series())
+    assert view.day_frame(date(2018, 10, 3))['VAL'].tolist() == [2.0]
+    frame = view.day_frame(date(2018, 9, 15))
+    assert frame.empty
+    assert list(frame.columns) == ['N_SH', 'date', 'VAL']
+
+
+def test_stale_click_after_month_change_aggregate(no_oracle):
+    view = MonthView(1, '1001', '2018-10', daily=october_series().to_frame('D'))
+    assert view.day_frame(date(2018, 11, 1)).empty
+    assert view.day_frame(date(2018, 9, 30)).empty
+
+
+def test_stale_click_outside_range(no_oracle):
+    view = RangeView(1, '1001', date(2018, 10, 1), date(2018, 10, 8), october_series().slice_days(
+        date(2018, 10, 1), date(2018, 10, 8)))
+    assert view.day_frame(date(2018, 10, 3))['VAL'].tolist() == [2.0]
+    assert view.day_frame(date(2018, 10, 8)).empty
+    assert view.day_frame(date(2018, 9, 3)).empty
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from webapp.energy.downsample import downsample, lttb, minmax
+
+
+@pytest.fixture
+def signal():
+    rng = np.random.RandomState(0)
+    y = rng.rand(1000)
+    y[437] = 50.0
+    y[611] = -50.0
+    return np.arange(1000, dtype=np.int64), y
+
+
+@pytest.mark.parametrize('method', [minmax, lttb])
+def test_short_series_is_kept(method):
+    y = np.arange(10.0)
+    assert method(np.arange(10), y, 20).tolist() == list(range(10))
+
+
+@pytest.mark.parametrize('method', [minmax, lttb])
+def test_bounds_and_order(method, signal):
+    x, y = signal
+    index = method(x, y, 100)
+    assert len(index) <= 100
+    assert index[0] == 0
+    assert index[-1] == len(y) - 1
+    assert (np.diff(index) > 0).all()
+
+
+def test_minmax_keeps_peaks(signal):
+    x, y = signal
+    index = minmax(x, y, 50)
+    assert 437 in index
+    assert 611 in index
+
+
+def test_lttb_returns_max_points(signal):
+    x, y = signal
+    index = lttb(x, y, 100)
+    assert len(index) == 100
+    assert 437 in index
+
+
+def test_downsample_frame(signal):
+    x, y = signal
+    frame = pd.DataFrame({'date': pd.date_range('2018-10-01', periods=len(y), freq='30min'), 'VAL': y})
+    assert downsample(frame, 2000) is frame
+    for method in ('minmax', 'lttb'):
+        result = downsample(frame, 100, method)
+        assert len(result) <= 100
+        assert result['date'].is_monotonic_increasing
+        assert result['VAL'].max() == 50.0
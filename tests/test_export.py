@@ -0,0 +1,40 @@
+from datetime import date
+
+from flask import Flask
+import pytest
+from werkzeug.exceptions import BadRequest
+
+from webapp.export.views import export_period
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['EXPORT_MAX_DAYS'] = 31
+    return app
+
+
+def period(app, query):
+    with app.test_request_context('/export/intervals.csv?' + query):
+        return export_period()
+
+
+def test_period_includes_end_day(app):
+    assert period(app, 'start=2018-10-01&end=2018-10-31') == (date(2018, 10, 1), date(2018, 11, 1))
+
+
+@pytest.mark.parametrize('query', [
+    '',
+    'start=2018-10-01',
+    'end=2018-10-31',
+    'start=&end=2018-10-31',
+    'start=2018-10-01&end=',
+    'start=garbage&end=2018-10-31',
+    'start=2018-10-01&end=2018-13-45',
+    'start=NaT&end=2018-10-31',
+    'start=2018-10-31&end=2018-10-01',
+    'start=2018-01-01&end=2018-12-31',
+])
+def test_bad_period_is_400(app, query):
+    with pytest.raises(BadRequest):
+        period(app, query)
@@ -0,0 +1,48 @@
+import logging
+import time
+
+from flask import Flask
+
+from webapp.energy.jobs import DONE, FAILED, JobQueue
+from webapp.metrics import BACKGROUND_ERRORS
+
+
+def wait(job, timeout=5):
+    deadline = time.time() + timeout
+    while job.finished is None and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def failed_jobs():
+    return BACKGROUND_ERRORS._values.get(('report-job',), 0)
+
+
+def test_failed_job_is_logged_and_counted(caplog):
+    app = Flask('webapp')
+    queue = JobQueue(app)
+    before = failed_jobs()
+
+    def task(job):
+        raise RuntimeError('нет шаблона')
+
+    with caplog.at_level(logging.ERROR):
+        job = queue.submit(('month', '1'), task)
+        wait(job)
+    assert job.status == FAILED
+    assert job.error == 'нет шаблона'
+    assert failed_jobs() == before + 1
+    assert any(record.exc_info and 'month' in record.getMessage() for record in caplog.records)
+
+
+def test_same_key_reuses_running_job():
+    queue = JobQueue(Flask('webapp'))
+
+    def task(job):
+        time.sleep(0.1)
+        return 'ok'
+
+    job = queue.submit(('month', '1'), task)
+    assert queue.submit(('month', '1'), task) is job
+    wait(job)
+    assert job.status == DONE
+    assert job.result == 'ok'
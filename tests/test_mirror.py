@@ -0,0 +1,115 @@
+from datetime import date, datetime, timedelta
+
+from flask import Flask
+import numpy as np
+import pytest
+
+from webapp.energy.mirror import LocalMirror, month_starts
+from webapp.energy.series import HalfHourSeries
+
+
+class StubSource:
+    """Источник с данными в памяти: {N_SH: последний день с данными}."""
+
+    def __init__(self, last_days, first_day=date(2018, 1, 1)):
+        self.last_days = dict(last_days)
+        self.first_day = first_day
+        self.requests = []
+
+    def objects(self):
+        return ['1']
+
+    def fetch(self, n_ob, date_start, date_end):
+        self.requests.append((date_start, date_end))
+        meters, dates, intervals, vals = [], [], [], []
+        for meter, last_day in self.last_days.items():
+            day = max(date_start.date(), self.first_day)
+            while day < date_end.date() and day <= last_day:
+                for slot in range(1, 49):
+                    meters.append(meter)
+                    dates.append(datetime.combine(day, datetime.min.time()))
+                    intervals.append(slot)
+                    vals.append(1.0)
+                day += timedelta(days=1)
+        return meters, dates, intervals, vals
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    app = Flask(__name__)
+    app.config.update(MIRROR_DIR=str(tmp_path), MIRROR_START='2018-01-01', MIRROR_OVERLAP_DAYS=2)
+    return LocalMirror(app)
+
+
+def test_month_starts():
+    assert list(month_starts(date(2018, 11, 15), date(2019, 2, 1))) == [
+        date(2018, 11, 1), date(2018, 12, 1), date(2019, 1, 1)]
+
+
+def test_silent_meter_does_not_rewind_sync(mirror):
+    source = StubSource({'A': date(2018, 7, 31), 'B': date(2018, 1, 5)})
+    mirror.sync_object(source, '1', until=date(2018, 8, 1))
+    assert mirror.synced_until('1') == date(2018, 8, 1)
+
+    source.last_days['A'] = date(2018, 8, 1)
+    source.requests = []
+    fetched = mirror.sync_object(source, '1', until=date(2018, 8, 2))
+
+    assert min(start for start, _ in source.requests) == datetime(2018, 7, 30)
+    assert fetched == 3 * 48
+
+
+def test_resync_overlap_does_not_double_values(mirror):
+    source = StubSource({'A': date(2018, 2, 10)})
+    mirror.sync_object(source, '1', until=date(2018, 2, 11))
+    mirror.sync_object(source, '1', until=date(2018, 2, 12))
+    series = mirror.read_month('1', 'A', '2018-02')
+    assert series.daily()[:10].tolist() == [48.0] * 10
+    assert series.has_data().sum() == 10
+
+
+def test_merge_keeps_earlier_data(mirror):
+    source = StubSource({'A': date(2018, 3, 31), 'B': date(2018, 3, 5)})
+    mirror.sync_object(source, '1', until=date(2018, 4, 1))
+    del source.last_days['B']
+    mirror.sync_object(source, '1', until=date(2018, 4, 2))
+    series = mirror.read_month('1', 'B', '2018-03')
+    assert np.flatnonzero(series.has_data()).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_covers_closed_months_only(mirror):
+    source = StubSource({'A': date(2018, 3, 31)})
+    mirror.sync_object(source, '1', until=date(2018, 4, 1))
+    assert mirror.covers('1', '2018-02')
+    assert not mirror.covers('1', '2018-03')
+    assert not mirror.covers('2', '2018-02')
+
+
+def test_merge_overwrites_present_values(mirror):
+    source = StubSource({'A': date(2018, 3, 31)})
+    mirror.sync_object(source, '1', until=date(2018, 4, 1))
+    conn = mirror._connect('1')
+    try:
+        mirror._merge(conn, '2018-03', {
+            'A': HalfHourSeries.for_month('2018-03', [datetime(2018, 3, 2)], [5], [7.0], meter='A')})
+        conn.commit()
+    finally:
+        conn.close()
+    series = mirror.read_month('1', 'A', '2018-03')
+    assert series.values[1, 4] == 7.0
+    assert series.daily()[1] == 47 + 7.0
+    assert series.has_data().sum() == 31
+
+
+def test_watermarks_track_last_interval(mirror):
+    source = StubSource({'A': date(2018, 3, 31), 'B': date(2018, 3, 5)})
+    mirror.sync_object(source, '1', until=date(2018, 4, 1))
+    del source.last_days['B']
+    mirror.sync_object(source, '1', until=date(2018, 4, 2))
+    conn = mirror._connect('1')
+    try:
+        marks = {n_sh: (last_day, last_slot) for n_sh, last_day, last_slot
+                 in conn.execute('SELECT n_sh, last_day, last_slot FROM watermarks')}
+    finally:
+        conn.close()
+    assert marks == {'A': ('2018-03-31', 48), 'B': ('2018-03-05', 48)}
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from flask import Flask
+import pytest
+
+from webapp.db import db
+from webapp.news.feed import news_feed
+from webapp.news.models import News
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False,
+                      NEWS_PAGE_SIZE=2, NEWS_CACHE_TTL=600)
+    db.init_app(app)
+    news_feed.init_app(app)
+    with app.app_context():
+        db.create_all()
+        news_feed.invalidate()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def add(n):
+    db.session.add(News(title='n{}'.format(n), url='u{}'.format(n), published=datetime(2019, 1, n)))
+
+
+def titles():
+    return [item.title for item in news_feed.page()[0]]
+
+
+def test_first_page_cached_until_commit(app):
+    add(1)
+    db.session.commit()
+    assert titles() == ['n1']
+    add(2)
+    db.session.flush()
+    assert titles() == ['n1']
+    db.session.commit()
+    assert titles() == ['n2', 'n1']
+
+
+def test_rollback_keeps_cache(app):
+    add(1)
+    db.session.commit()
+    assert titles() == ['n1']
+    generation = news_feed._generation
+    add(2)
+    db.session.flush()
+    db.session.rollback()
+    assert news_feed._generation == generation
+    assert titles() == ['n1']
+
+
+def test_page_read_during_change_is_not_cached(app, monkeypatch):
+    add(1)
+    db.session.commit()
+    load_page = news_feed.load_page
+
+    def racing_load(after=None):
+        page = load_page(after)
+        news_feed.invalidate()
+        return page
+
+    monkeypatch.setattr(news_feed, 'load_page', racing_load)
+    news_feed.page()
+    assert news_feed._first_page is None
+
+
+def test_next_pages_by_cursor(app):
+    for n in (1, 2, 3):
+        add(n)
+    db.session.commit()
+    items, cursor = news_feed.page()
+    assert [item.title for item in items] == ['n3', 'n2']
+    items, cursor = news_feed.page(cursor)
+    assert [item.title for item in items] == ['n1']
+    assert cursor is None
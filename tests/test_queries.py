@@ -0,0 +1,37 @@
+import pytest
+
+from webapp.energy.queries import MAX_IN_LIST, in_clause
+
+
+def test_in_clause_pads_to_power_of_two():
+    sql, binds = in_clause('n_sh', ['1', '2', '3'])
+    assert sql == 'IN (:n_sh0, :n_sh1, :n_sh2, :n_sh3)'
+    assert binds == {'n_sh0': '1', 'n_sh1': '2', 'n_sh2': '3', 'n_sh3': '3'}
+
+
+def test_in_clause_single_value():
+    assert in_clause('n', ['1']) == ('IN (:n0)', {'n0': '1'})
+
+
+def test_in_clause_drops_repeats():
+    sql, binds = in_clause('n', ['1', '2', '1', '2'])
+    assert sql == 'IN (:n0, :n1)'
+    assert binds == {'n0': '1', 'n1': '2'}
+
+
+def test_in_clause_same_text_for_similar_lengths():
+    assert in_clause('n', list('abcde'))[0] == in_clause('n', list('abcdefgh'))[0]
+
+
+def test_in_clause_empty():
+    with pytest.raises(ValueError):
+        in_clause('n', [])
+
+
+def test_in_clause_respects_oracle_limit():
+    sql, binds = in_clause('n', [str(i) for i in range(600)])
+    assert len(binds) == MAX_IN_LIST
+    assert sql.count(':n') == MAX_IN_LIST
+    assert len(in_clause('n', [str(i) for i in range(MAX_IN_LIST)])[1]) == MAX_IN_LIST
+    with pytest.raises(ValueError):
+        in_clause('n', [str(i) for i in range(MAX_IN_LIST + 1)])
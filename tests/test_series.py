@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from webapp.energy.series import HalfHourSeries, month_bounds, split_by_meter
+
+
+def test_month_bounds():
+    start, days = month_bounds('2019-02')
+    assert start == np.datetime64('2019-02-01')
+    assert days == 28
+    assert month_bounds('2020-02-15')[1] == 29
+
+
+def test_from_intervals_fills_matrix():
+    dates = [datetime(2018, 10, 1), datetime(2018, 10, 1), datetime(2018, 10, 3)]
+    series = HalfHourSeries.from_intervals(dates, [1, 48, 2], [1.5, 2.0, 3.0], meter='A')
+    assert series.start == np.datetime64('2018-10-01')
+    assert series.values.shape == (3, 48)
+    assert series.values.dtype == np.float32
+    assert series.values[0, 0] == 1.5
+    assert series.values[0, 47] == 2.0
+    assert series.values[2, 1] == 3.0
+    assert series.has_data().tolist() == [True, False, True]
+    assert int((~series.missing).sum()) == 3
+
+
+def test_from_intervals_sums_repeats_and_drops_bad_rows():
+    day = datetime(2018, 10, 1)
+    dates = [day, day, day, day, datetime(2018, 11, 1)]
+    series = HalfHourSeries.for_month('2018-10', dates, [5, 5, 0, 49, 1], [1.0, 2.0, 7.0, 7.0, 7.0])
+    assert series.days == 31
+    assert series.values[0, 4] == 3.0
+    assert series.daily()[0] == 3.0
+    assert series.daily().sum() == 3.0
+    assert int((~series.missing).sum()) == 1
+
+
+def test_from_intervals_skips_nan():
+    day = datetime(2018, 10, 1)
+    series = HalfHourSeries.for_month('2018-10', [day, day], [1, 2], [np.nan, 4.0])
+    assert series.missing[0, 0]
+    assert not series.missing[0, 1]
+    assert series.daily()[0] == 4.0
+
+
+def test_from_intervals_without_data_needs_start():
+    with pytest.raises(ValueError):
+        HalfHourSeries.from_intervals([], [], [])
+    series = HalfHourSeries.for_month('2018-10', [], [], [])
+    assert series.values.shape == (31, 48)
+    assert not series.has_data().any()
+
+
+def test_rollups_and_frames():
+    day = datetime(2018, 10, 2)
+    series = HalfHourSeries.for_month('2018-10', [day] * 4, [1, 2, 3, 48], [1.0, 2.0, 3.0, 4.0], meter='A')
+    assert series.hourly()[1, :2].tolist() == [3.0, 3.0]
+    assert series.hourly()[1, 23] == 4.0
+    daily = series.to_frame('D')
+    assert daily['date'].tolist() == [datetime(2018, 10, 2)]
+    assert daily['VAL'].tolist() == [10.0]
+    assert daily['N_SH'].tolist() == ['A']
+    halfhour = series.to_frame('30min')
+    assert halfhour['date'].tolist() == [datetime(2018, 10, 2, 0, 0), datetime(2018, 10, 2, 0, 30),
+                                         datetime(2018, 10, 2, 1, 0), datetime(2018, 10, 2, 23, 30)]
+    assert len(series.to_frame('30min', only_present=False)) == 31 * 48
+
+
+def test_split_by_meter():
+    day = datetime(2018, 10, 5)
+    meters = ['A', 'B', 'A', 'B', 1001]
+    dates = [day, day, day, datetime(2018, 9, 30), day]
+    series = split_by_meter('2018-10', meters, dates, [1, 1, 2, 1, 3], [1.0, 2.0, 3.0, 9.0, 5.0])
+    assert sorted(series) == ['1001', 'A', 'B']
+    assert series['A'].meter == 'A'
+    assert series['A'].values.shape == (31, 48)
+    assert series['A'].values[4, :2].tolist() == [1.0, 3.0]
+    assert series['B'].daily().sum() == 2.0
+    assert series['1001'].values[4, 2] == 5.0
+    assert int((~series['B'].missing).sum()) == 1
+
+
+def test_split_by_meter_matches_from_intervals():
+    rng = np.random.RandomState(0)
+    size = 500
+    meters = rng.choice(['A', 'B', 'C'], size)
+    dates = [datetime(2018, 10, 1 + int(d)) for d in rng.randint(0, 31, size)]
+    intervals = rng.randint(1, 49, size)
+    vals = rng.rand(size)
+    series = split_by_meter('2018-10', meters, dates, intervals, vals)
+    for meter in ('A', 'B', 'C'):
+        mask = meters == meter
+        expected = HalfHourSeries.for_month('2018-10', [d for d, m in zip(dates, mask) if m],
+                                            intervals[mask], vals[mask])
+        np.testing.assert_array_equal(series[meter].values, expected.values)
+        np.testing.assert_array_equal(series[meter].missing, expected.missing)
+
+
+def test_split_by_meter_empty():
+    assert split_by_meter('2018-10', [], [], [], []) == {}
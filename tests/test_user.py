@@ -0,0 +1,18 @@
+from webapp.user.models import User
+from webapp.user.session_cache import CachedUser
+
+
+def test_can_view_own_objects_only():
+    user = User(username='u', role='user', n_ob='12, 15')
+    cached = CachedUser(user)
+    for item in (user, cached):
+        assert item.can_view('12')
+        assert item.can_view(15)
+        assert not item.can_view('1')
+        assert not item.can_view(None)
+
+
+def test_admin_can_view_any_object():
+    user = User(username='a', role='admin', n_ob='')
+    assert user.can_view('1')
+    assert CachedUser(user).can_view('1')
@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template
+from flask import Blueprint, abort, current_app, jsonify, render_template, request
 from webapp.user.decorators import admin_required
 
 blueprint = Blueprint('admin', __name__, url_prefix='/admin')
@@ -9,4 +9,22 @@ blueprint = Blueprint('admin', __name__, url_prefix='/admin')
 def admin_index():
     title = "Панель управления"
     return render_template('admin/index.html', page_title=title)
-    
\ No newline at end of file
+
+
+@blueprint.route('/oracle-pool')
+@admin_required
+def oracle_pool_stats():
+    oracle = current_app.extensions.get('oracle_pool')
+    if oracle is None:
+        abort(404)
+    return jsonify(oracle.stats())
+
+
+@blueprint.route('/reference', methods=['GET', 'POST'])
+@admin_required
+def reference_data():
+    references = current_app.extensions.get('reference_data', {})
+    if request.method == 'POST':
+        for reference in references.values():
+            reference.refresh()
+    return jsonify({name: reference.info() for name, reference in references.items()})
@@ -0,0 +1,636 @@
+"""Дашборд Dash (/dash/) и все, что работает с данными Oracle.
+
+Подключается к приложению из create_app(); здесь, а не в webapp/__init__,
+импортируются cx_Oracle, dash, pandas, plotly и openpyxl, поэтому
+админские утилиты и миграции запускаются без них.
+"""
+import dash
+import dash_bootstrap_components as dbc
+import dash_core_components as dcc
+import dash_table
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+import dash_html_components as html
+from datetime import datetime, timedelta
+from flask import abort, g, send_file
+from flask_login import login_required
+import pandas as pd
+import plotly.graph_objs as go
+
+from webapp.energy.cache import month_cache, month_key
+from webapp.energy.data import load_meters_month, load_meters_range, load_month_view, load_range_view
+from webapp.energy.downsample import downsample
+from webapp.energy.jobs import DONE, FAILED, report_jobs
+from webapp.energy.mirror import local_mirror
+from webapp.energy.oracle import DatabaseError, oracle
+from webapp.energy.reference import feeder_index, last_data_table, object_catalogue
+from webapp.energy.report_cache import is_key, report_cache
+from webapp.energy.reports import XLSX_MIMETYPE, month_report_task, object_report_task, report_renderer
+from webapp.energy.store import dataset_store
+from webapp.export.views import blueprint as export_blueprint
+from webapp.metrics import CALLBACK_ERRORS, ORACLE_ERRORS, timed_callback
+
+
+def init_data(app, background=True):
+    """Расширения для данных Oracle без веб-части: пул, кэши, справочники.
+
+    background - запускать ли фоновое обновление справочников.
+    """
+    if 'ORACLE_DSN' not in app.config:
+        # USER_NAME и PASSWORD уже в конфиге, dns_tsn - нет (имя в нижнем регистре)
+        from webapp.config import dns_tsn
+        app.config['ORACLE_DSN'] = dns_tsn
+    oracle.init_app(app)
+    month_cache.init_app(app)
+    dataset_store.init_app(app)
+    report_renderer.init_app(app)
+    report_jobs.init_app(app)
+    report_cache.init_app(app)
+    local_mirror.init_app(app)
+    object_catalogue.init_app(app)
+    feeder_index.init_app(app)
+    last_data_table.init_app(app)
+    if background:
+        object_catalogue.start()
+        feeder_index.start()
+        last_data_table.start()
+
+
+def init_app(app, background=True):
+    """Расширения для данных Oracle, выгрузка и приложение Dash."""
+    init_data(app, background)
+    app.register_blueprint(export_blueprint)
+
+    dashapp = dash.Dash(__name__, server=app, routes_pathname_prefix='/dash/', external_stylesheets=[dbc.themes.BOOTSTRAP])
+    for view_func in dashapp.server.view_functions:
+        if view_func.startswith('/dash/'):
+            dashapp.server.view_functions[view_func] = login_required(dashapp.server.view_functions[view_func])
+
+    dashapp.config.suppress_callback_exceptions = True
+    app.extensions['dash'] = dashapp
+
+    def oracle_error(callback):
+        """Ошибка Oracle в callback'е: в журнал и в счетчики метрик."""
+        app.logger.exception('Ошибка Oracle в %s', callback)
+        ORACLE_ERRORS.inc(stage='callback')
+        CALLBACK_ERRORS.inc(callback=callback)
+
+    @dashapp.callback(Output('page-content', 'children'),
+                    [Input('url', 'pathname')])
+    @timed_callback('display_page')
+    def display_page(pathname):
+        if pathname == '/dash/':
+            return layout1
+        elif pathname == '/dash/reports':
+            return layout2
+        else:
+            return abort(404)
+        
+    
+    #DASH_LAYOUT-------------------------------------------------------------------------------------------------------------
+    #navbar-----------------------------------------------------------------------------------------------------------------
+    navbar = dbc.NavbarSimple(
+        children=[
+            #dbc.NavItem(dbc.NavLink("Link", href='')),
+            dbc.DropdownMenu(
+                nav=True,
+                in_navbar=True,
+                label="Меню",
+                children=[
+                    dbc.DropdownMenuItem("Отчеты", href='/dash/reports'),
+                    dbc.DropdownMenuItem("Графики", href='/dash/'),
+                    dbc.DropdownMenuItem(divider=True),
+                    dbc.DropdownMenuItem("Выйти", href="/users/logout", external_link=True),
+                ],
+            ),
+        ],
+        brand="Главная",
+        brand_href="/",
+        brand_external_link=True,
+        sticky="top",
+        )
+    
+    
+    #/end_navbar---------------------------------------------------------------------------
+    #body------------------------------------------------------------------------------
+    body_graph = dbc.Container(
+        [        
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.H4("1. Выберите объект:"),                            
+                            dcc.Dropdown(id='choose-object', value='', placeholder='Выберите объект'),                                                        
+                            html.H4("2. Выберите месяц:"),
+                            html.Div(dcc.DatePickerSingle(id='date-picker-single', date=datetime(2018, 10,10))),
+                            dbc.RadioItems(id='period-mode', className="form-check", value='month',
+                                           options=[{'label': 'Месяц', 'value': 'month'},
+                                                    {'label': 'Период', 'value': 'range'}]),
+                            html.Div(dcc.DatePickerRange(id='date-picker-range', start_date=datetime(2018, 1, 1),
+                                                         end_date=datetime(2018, 12, 31))),
+                            #dbc.Button("Загрузить данные", id='submit-button', color="secondary"),
+                            html.Div(dbc.Button(id='report-button', children='Сформировать отчет за месяц', color="secondary")),
+                            html.Div(id='report-status'),
+                            html.Div(dbc.Button(id='download-link', children='Сохранить отчет за месяц', disabled=True)),
+                            html.Div(id='report-job', style={'display': 'none'}),
+                            dcc.Interval(id='report-poll', interval=1000, disabled=True),
+                        ],
+                        md=4, 
+                    ),
+                    dbc.Col(
+                        [
+                            #html.H4("График за месяц"),
+                            html.Div(
+                                [dcc.Loading(id='loading-1', 
+                                            children=
+                                                    [html.Div(
+                                                            dcc.Graph(id='month-graph', style={'height': '400px'}))], 
+                                            type='circle', fullscreen=True                                               
+                                            )
+                                ]),
+                            html.Div(
+                                [dcc.Loading(id='loading-2', 
+                                            children=
+                                                    [html.Div(id='json-month-data', style={'display': 'none'})], 
+                                            type='circle', fullscreen=True                                               
+                                            )
+                                ]),
+                            #html.Div(id='json-month-data', style={'display': 'none'}),
+                            #html.Div(children=f"'{g.user.n_ob}'", id='user-object', style={'display': 'none'})
+                        ]
+                    ),
+                ], style={'height': '401px'}
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.H4("3. Выберите фидер:"),
+                            dbc.RadioItems(id='list-counters', className="form-check"),  
+                        ],
+                        md=4,
+                    ),
+                    dbc.Col(
+                        [
+                            #html.Div(html.Pre(id='click-data')),
+                            html.Div(dcc.Graph(id='day-graph', style={'height': '400px'})) 
+                        ],
+                        md=8,
+                    )
+                ]
+            ),
+            dbc.Row(
+                dbc.Col(
+                    [
+                        html.Div(dcc.Graph(id='interval-graph', style={'height': '400px'}))
+                    ]
+                )
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.H4("Сравнение фидеров:"),
+                            dcc.Dropdown(id='compare-counters', multi=True, placeholder='Выберите фидеры'),
+                            dbc.RadioItems(id='compare-mode', className="form-check", value='group',
+                                           options=[{'label': 'Рядом', 'value': 'group'},
+                                                    {'label': 'Накоплением', 'value': 'stack'}]),
+                        ],
+                        md=4,
+                    ),
+                    dbc.Col(
+                        [
+                            html.Div(dcc.Graph(id='compare-graph', style={'height': '400px'}))
+                        ],
+                        md=8,
+                    )
+                ]
+            )
+        ],
+        className="mt-4",
+    )
+
+
+    body_report = dbc.Container(
+        [
+            dbc.Row(
+                [
+                    dbc.Col(html.Div(
+                    [
+                        html.Div(html.H4("1. Выберите объект:")),                             
+                        html.Div(dcc.Dropdown(id='choose-object', value='', placeholder='Выберите объект')),                       
+                    ],
+                    ), width=7,
+                ), 
+                    dbc.Col(
+                    [
+                        html.Div(html.H4("2. Выберите месяц:")),
+                        html.Div(dcc.DatePickerSingle(id='date-picker-single', date=datetime(2018, 10,10))),                        
+                    ], 
+                ),
+                ]
+                
+            ),
+            dbc.Row(                            
+                dbc.Col(
+                    [
+                        html.H5("Последние данные по объекту:"),
+                        html.Div(dash_table.DataTable(id='table-last-day', 
+                        columns=[{'name': 'Номер объекта', 'id': 'N_OB'}, 
+                        {'name': 'Счетчик', 'id':'N_SH'}, 
+                        {'name': 'Фидер', 'id': 'TXT'}, 
+                        {'name': 'Последние данные', 'id': 'DT'},
+                        {'name': 'Дней нет данных', 'id': 'Дней нет данных'}],
+                        style_table={'maxHeight': '300px', 'overflowY': 'scroll'}
+                        )),
+                    ]
+                )
+            ),
+            dbc.Row(                            
+                dbc.Col(
+                    [
+                        html.H5("Счетчики без данных больше N дней (по всем объектам):"),
+                        html.Div(dcc.Input(id='silent-days', type='number', min=0, value=3)),
+                        html.Div(dash_table.DataTable(id='table-silent', 
+                        columns=[{'name': 'Номер объекта', 'id': 'N_OB'}, 
+                        {'name': 'Счетчик', 'id':'N_SH'}, 
+                        {'name': 'Фидер', 'id': 'TXT'}, 
+                        {'name': 'Последние данные', 'id': 'DT'},
+                        {'name': 'Дней нет данных', 'id': 'Дней нет данных'}],
+                        style_table={'maxHeight': '300px', 'overflowY': 'scroll'}
+                        )),
+                    ]
+                )
+            ),
+            dbc.Row(
+                dbc.Col(
+                    [
+                        html.H5("Отчет по всем фидерам объекта за месяц:"),
+                        html.Div(dbc.Button(id='object-report-button', children='Сформировать отчет по объекту', color="secondary")),
+                        html.Div(id='object-report-status'),
+                        html.Div(dbc.Button(id='object-download-link', children='Сохранить отчет по объекту', disabled=True)),
+                        html.Div(id='object-report-job', style={'display': 'none'}),
+                        dcc.Interval(id='object-report-poll', interval=1000, disabled=True),
+                    ]
+                )
+            )
+        ],
+        className="mt-4",
+    )
+
+
+    
+    layout1 = html.Div([navbar, body_graph])    
+    layout2 = html.Div([navbar, body_report])   
+    
+    
+    dashapp.layout = html.Div([dcc.Location(id='url', refresh=False), html.Div(id='page-content')])
+    
+    #DASH_CALLBACKS----------------------------------------------------------------------------------------------------------
+    #получение объекта/списка объектов из БД
+    @dashapp.callback(Output('choose-object', 'options'), 
+                    [Input('page-content', 'n_clicks')])
+    @timed_callback('get_object')
+    def get_object(n_clicks):
+        try:
+            return object_catalogue.options_for(g.user)
+        except DatabaseError:
+            oracle_error('get_object')
+        
+        
+        
+    #выбор опций для radioitems с названиями фидеров выбранного объекта 
+       
+    @dashapp.callback([Output('list-counters', 'options'),
+                    Output('compare-counters', 'options')],
+                    [Input('choose-object', 'value')])
+    @timed_callback('get_list_counters_of_obj')
+    def get_list_counters_of_obj(num_obj):
+        try:        
+            options = feeder_index.options(num_obj)
+        except DatabaseError:
+            oracle_error('get_list_counters_of_obj')
+            raise PreventUpdate
+        return options, options
+                
+    #создание и скачивание файла отчета (в фоне, по кнопке)
+    @dashapp.callback(Output('report-job', 'children'),
+                    [Input('report-button', 'n_clicks'),
+                    Input('list-counters', 'value')],
+                    [State('choose-object', 'value'),
+                    State('date-picker-single', 'date')])
+    @timed_callback('start_report')
+    def start_report(n_clicks, number_counter, number_object, choosen_month):
+        triggered = [t['prop_id'] for t in dash.callback_context.triggered]
+        if 'report-button.n_clicks' not in triggered or not n_clicks or not number_counter:
+            return ''
+        if not g.user.can_view(number_object):
+            raise PreventUpdate
+        key = ('month', str(number_object), str(number_counter), month_key(choosen_month))
+        job = report_jobs.submit(key, month_report_task, number_object, number_counter, choosen_month)
+        return job.id
+
+    @dashapp.callback(Output('object-report-job', 'children'),
+                    [Input('object-report-button', 'n_clicks'),
+                    Input('choose-object', 'value')],
+                    [State('date-picker-single', 'date')])
+    @timed_callback('start_object_report')
+    def start_object_report(n_clicks, number_object, choosen_month):
+        triggered = [t['prop_id'] for t in dash.callback_context.triggered]
+        if 'object-report-button.n_clicks' not in triggered or not n_clicks or not number_object:
+            return ''
+        if not g.user.can_view(number_object):
+            raise PreventUpdate
+        key = ('object', str(number_object), month_key(choosen_month))
+        job = report_jobs.submit(key, object_report_task, number_object, choosen_month)
+        return job.id
+
+    #опрос статуса фоновой задачи и выдача ссылки на готовый отчет
+    def register_report_polling(job_div, status_div, link, poll):
+        @dashapp.callback([Output(status_div, 'children'),
+                        Output(link, 'href'),
+                        Output(link, 'disabled'),
+                        Output(poll, 'disabled')],
+                        [Input(job_div, 'children'),
+                        Input(poll, 'n_intervals')])
+        @timed_callback('poll_' + job_div)
+        def poll_report(job_id, n_intervals):
+            job = report_jobs.get(job_id) if job_id else None
+            if job is None:
+                return '', None, True, True
+            if job.status == DONE:
+                return 'Отчет готов', job.result, False, True
+            if job.status == FAILED:
+                return 'Не удалось сформировать отчет', None, True, True
+            return 'Формируется отчет: {:.0%}'.format(job.progress), None, True, False
+
+    register_report_polling('report-job', 'report-status', 'download-link', 'report-poll')
+    register_report_polling('object-report-job', 'object-report-status', 'object-download-link', 'object-report-poll')
+
+    @dashapp.server.route('/downloads/<key>/<filename>')
+    @login_required
+    def serve_static(key, filename):
+        report = report_cache.open(key) if is_key(key) else None
+        if report is None:
+            abort(404)
+        return send_file(report, mimetype=XLSX_MIMETYPE, as_attachment=True, attachment_filename=filename)
+
+    #создание датасетов DATAFRAME объекта за месяц, день   
+    @dashapp.callback(Output('json-month-data', 'children'),
+                    [Input('list-counters', 'value'),
+                    Input('period-mode', 'value')],
+                    [State('choose-object', 'value'),
+                    State('date-picker-single', 'date'),
+                    State('date-picker-range', 'start_date'),
+                    State('date-picker-range', 'end_date')])
+    @timed_callback('get_month_data')
+    def get_month_data(number_counter, period_mode, number_object, choosen_month, start_date, end_date):
+        if not number_counter:
+            raise PreventUpdate
+        try:
+            if period_mode == 'range' and start_date and end_date:
+                date_start, date_end = period_bounds(start_date, end_date)
+                view = load_range_view(number_object, number_counter, date_start, date_end)
+            else:
+                view = load_month_view(number_object, number_counter, choosen_month,
+                                       app.config.get('MONTH_QUERY_MODE', 'aggregate'))
+        except DatabaseError:
+            oracle_error('get_month_data')
+            raise PreventUpdate
+        except IndexError:
+            app.logger.info('Нет данных: объект %s, фидер %s, месяц %s', number_object, number_counter, choosen_month)
+            raise PreventUpdate
+
+        return dataset_store.put(view)
+
+    #границы периода [начало, конец) из DatePickerRange, не длиннее RANGE_MAX_DAYS
+    def period_bounds(start_date, end_date):
+        date_start = pd.Timestamp(start_date).date()
+        date_end = pd.Timestamp(end_date).date() + timedelta(days=1)
+        max_days = app.config.get('RANGE_MAX_DAYS', 731)
+        if (date_end - date_start).days > max_days:
+            date_end = date_start + timedelta(days=max_days)
+        return date_start, date_end
+
+    #не больше GRAPH_MAX_POINTS точек на график, пики сохраняются
+    def graph_frame(frame):
+        return downsample(frame, app.config.get('GRAPH_MAX_POINTS', 1000),
+                          app.config.get('GRAPH_DOWNSAMPLE', 'minmax'))
+
+    #формирования графика потребления за месяц
+    @dashapp.callback(Output('month-graph', 'figure'), 
+                    [Input('list-counters', 'value'), 
+                    Input('json-month-data', 'children')])
+    @timed_callback('update_graph')
+    def update_graph(number_counter, json_month):    
+        
+        view = dataset_store.get(json_month)
+        if view is None:
+            raise PreventUpdate
+        dff = graph_frame(view.daily_frame())
+
+        number_counter = view.n_sh
+        #график        
+        figure = go.Figure(
+                data=[
+                    go.Bar(
+                        x=dff['date'].tolist(),
+                        y=dff['VAL'].tolist(),
+                        name='Расход',
+                        marker=go.bar.Marker(
+                            color='rgb(55, 83, 109)'
+                        )
+                    ),
+                ],
+                layout=go.Layout(
+                    yaxis={'type': 'log', 'title': 'Энергия, кВтч', 'autorange': True},
+                    xaxis={'title': ''},
+                    title=f"Расход электроэнергии {view.label} по счетчику № {number_counter}",
+                    showlegend=True,
+                    legend=go.layout.Legend(
+                        x=0,
+                        y=1.0
+                    ),
+                    margin=go.layout.Margin(l=40, r=0, t=40, b=30)
+                )
+            )
+        return figure
+
+    #формирования графика потребления за день
+    @dashapp.callback(Output('day-graph', 'figure'),
+                    [Input('month-graph', 'clickData'),
+                    Input('json-month-data', 'children')])
+    @timed_callback('update_daily_graph')
+    def update_daily_graph(clickData, json_month):
+        view = dataset_store.get(json_month)
+        if view is None or clickData is None:
+            raise PreventUpdate
+        clickedData = clickData['points'][0]['x']
+        begin_day = pd.Timestamp(clickedData)
+        try:
+            dff_day = graph_frame(view.day_frame(begin_day.date()))
+        except DatabaseError:
+            oracle_error('update_daily_graph')
+            raise PreventUpdate
+        number_counter = view.n_sh
+        #график        
+        figure = go.Figure(
+                data=[
+                    go.Bar(
+                        x=dff_day['date'].tolist(),
+                        y=dff_day['VAL'].tolist(),
+                        name='Расход',
+                        marker=go.bar.Marker(
+                            color='green'
+                        )
+                    ),
+                ],
+                layout=go.Layout(
+                    yaxis={'type': 'log', 'title': 'Энергия, кВтч'},
+                    xaxis={'title': ''},
+                    title=f"Расход электроэнергии за день по счетчику № {number_counter}",
+                    showlegend=True,
+                    legend=go.layout.Legend(
+                        x=0,
+                        y=1.0
+                    ),
+                    margin=go.layout.Margin(l=40, r=0, t=40, b=30)
+                )
+            )
+        return figure
+
+
+
+    #получасовки за месяц; пока ряд не загружен (режим aggregate), до увеличения показываются суточные суммы,
+    #а получасовки видимого участка догружаются только при увеличении (relayoutData)
+    def zoom_range(relayoutData):
+        if not relayoutData or relayoutData.get('xaxis.autorange'):
+            return None, None
+        bounds = relayoutData.get('xaxis.range') or [relayoutData.get('xaxis.range[0]'),
+                                                     relayoutData.get('xaxis.range[1]')]
+        if None in bounds:
+            return None, None
+        return pd.Timestamp(bounds[0]), pd.Timestamp(bounds[1])
+
+    @dashapp.callback(Output('interval-graph', 'figure'),
+                    [Input('json-month-data', 'children'),
+                    Input('interval-graph', 'relayoutData')])
+    @timed_callback('update_interval_graph')
+    def update_interval_graph(json_month, relayoutData):
+        view = dataset_store.get(json_month)
+        if view is None:
+            raise PreventUpdate
+        triggered = [t['prop_id'] for t in dash.callback_context.triggered]
+        start, end = (None, None) if 'json-month-data.children' in triggered else zoom_range(relayoutData)
+        name = 'Получасовки'
+        try:
+            if start is None and view.series is None:
+                dff = graph_frame(view.daily_frame())
+                name = 'Сутки (увеличьте участок, чтобы увидеть получасовки)'
+            else:
+                dff = graph_frame(view.halfhour_frame(start, end))
+        except DatabaseError:
+            oracle_error('update_interval_graph')
+            raise PreventUpdate
+        xaxis = {'title': ''}
+        if start is not None:
+            xaxis['range'] = [start, end]
+        figure = go.Figure(
+                data=[
+                    go.Scatter(
+                        x=dff['date'].tolist(),
+                        y=dff['VAL'].tolist(),
+                        mode='lines',
+                        name=name,
+                        line=go.scatter.Line(color='rgb(55, 83, 109)')
+                    ),
+                ],
+                layout=go.Layout(
+                    yaxis={'title': 'Энергия, кВтч'},
+                    xaxis=xaxis,
+                    title=f"Получасовой профиль {view.label} по счетчику № {view.n_sh}",
+                    showlegend=True,
+                    uirevision=json_month,
+                    margin=go.layout.Margin(l=40, r=0, t=40, b=30)
+                )
+            )
+        return figure
+
+
+    #суточный расход нескольких фидеров на одном графике (данные - одним запросом N_SH IN (...))
+    @dashapp.callback(Output('compare-graph', 'figure'),
+                    [Input('compare-counters', 'value'),
+                    Input('compare-mode', 'value')],
+                    [State('choose-object', 'value'),
+                    State('period-mode', 'value'),
+                    State('date-picker-single', 'date'),
+                    State('date-picker-range', 'start_date'),
+                    State('date-picker-range', 'end_date')])
+    @timed_callback('update_compare_graph')
+    def update_compare_graph(counters, compare_mode, number_object, period_mode, choosen_month, start_date, end_date):
+        if not counters or not number_object or not g.user.can_view(number_object):
+            raise PreventUpdate
+        # только счетчики выбранного объекта
+        names = {str(n_sh): name for n_sh, name in feeder_index.feeders(number_object)}
+        counters = [n_sh for n_sh in counters if str(n_sh) in names]
+        counters = counters[:app.config.get('COMPARE_MAX_METERS', 20)]
+        if not counters:
+            raise PreventUpdate
+        try:
+            if period_mode == 'range' and start_date and end_date:
+                loaded = load_meters_range(number_object, counters, *period_bounds(start_date, end_date))
+            else:
+                loaded = load_meters_month(number_object, counters, choosen_month)
+        except DatabaseError:
+            oracle_error('update_compare_graph')
+            raise PreventUpdate
+        data = []
+        for n_sh, series in loaded:
+            dff = graph_frame(series.to_frame('D'))
+            data.append(go.Bar(x=dff['date'].tolist(), y=dff['VAL'].tolist(), name=names.get(n_sh, n_sh)))
+        figure = go.Figure(
+                data=data,
+                layout=go.Layout(
+                    barmode=compare_mode,
+                    yaxis={'title': 'Энергия, кВтч'},
+                    xaxis={'title': ''},
+                    title="Суточный расход электроэнергии по фидерам",
+                    showlegend=True,
+                    margin=go.layout.Margin(l=40, r=0, t=40, b=30)
+                )
+            )
+        return figure
+
+
+    #создание таблицы время прихода последних данных--------------------------------------------------------------------------------------
+    @dashapp.callback(Output('table-last-day', 'data'),
+                    [Input('choose-object', 'value')])
+    @timed_callback('create_table_last_day')
+    def create_table_last_day(number_object):
+        try:       
+            return last_data_table.for_object(number_object)
+        except DatabaseError:
+            oracle_error('create_table_last_day')
+        return []
+
+    #счетчики, от которых давно нет данных (по всем доступным объектам)
+    @dashapp.callback(Output('table-silent', 'data'),
+                    [Input('silent-days', 'value')])
+    @timed_callback('create_table_silent')
+    def create_table_silent(min_days):
+        try:
+            objects = None if g.user.is_admin else g.user.objects
+            return last_data_table.silent(min_days or 0, objects)
+        except DatabaseError:
+            oracle_error('create_table_silent')
+        return []
+
+
+        #рабочий пример с click-data
+        #@dashapp.callback(Output('click-data', 'children'),
+        #                  [Input('month-graph', 'clickData')])
+        #def diplay_clickdata(clickData):
+        #    return json.dumps(clickData, indent=2)
+    #/END_DASH_CALLBACKS-----------------------------------------------------------------------------------------------------------------
+
+    return dashapp
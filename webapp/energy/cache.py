@@ -0,0 +1,169 @@
+"""Кэш загруженных помесячных данных счетчиков.
+
+Ключ - (N_OB, N_SH, месяц), для суточных сумм и профилей отдельных суток
+перед ним ставится вид записи ('daily', 'day'). В памяти процесса держится LRU ограниченного
+размера; если задан MONTH_CACHE_DIR, записи дублируются на диск и видны
+всем рабочим процессам. Текущий месяц еще дополняется данными, поэтому
+живет меньше (MONTH_CACHE_CURRENT_TTL), закрытые месяцы - MONTH_CACHE_TTL.
+"""
+from collections import OrderedDict
+from datetime import datetime
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+
+def month_key(month):
+    """'2018-10-10T00:00:00' -> '2018-10'."""
+    return str(month)[:7]
+
+
+class MonthCache:
+
+    def __init__(self, app=None):
+        self.max_items = 128
+        self.ttl = 24 * 3600
+        self.current_ttl = 300
+        self.directory = None
+        self.max_disk_items = 2000
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._loading = {}
+        self.hits = 0
+        self.misses = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.max_items = config.get('MONTH_CACHE_SIZE', self.max_items)
+        self.ttl = config.get('MONTH_CACHE_TTL', self.ttl)
+        self.current_ttl = config.get('MONTH_CACHE_CURRENT_TTL', self.current_ttl)
+        self.max_disk_items = config.get('MONTH_CACHE_DISK_SIZE', self.max_disk_items)
+        self.directory = config.get('MONTH_CACHE_DIR')
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        app.extensions['month_cache'] = self
+
+    def ttl_for(self, key):
+        # последний элемент ключа - месяц '2018-10' или день '2018-10-05'
+        if key[-1][:7] == datetime.now().strftime('%Y-%m'):
+            return self.current_ttl
+        return self.ttl
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                expires, value = item
+                if expires > now:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._items[key]
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._remember(key, value, now)
+        return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+        self._disk_set(key, value)
+
+    def get_or_load(self, key, loader):
+        """Значение из кэша или loader(); параллельные промахи по одному
+        ключу ждут первую загрузку, а не идут в Oracle сами."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._lock:
+            key_lock = self._loading.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key)
+            if value is None:
+                value = loader()
+                self.set(key, value)
+        with self._lock:
+            self._loading.pop(key, None)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+        if self.directory:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def _remember(self, key, value, now):
+        self._items[key] = (now + self.ttl_for(key), value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def _path(self, key):
+        # имя файла - хэш ключа: части ключа приходят из браузера и не должны попадать в путь
+        digest = hashlib.sha1('|'.join(str(part) for part in key).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, '{}.pickle'.format(digest))
+
+    def _disk_get(self, key, now):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl_for(key) <= now:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            # время доступа для LRU-вытеснения с диска
+            os.utime(path, (now, os.path.getmtime(path)))
+            return value
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+
+    def _disk_set(self, key, value):
+        if not self.directory:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._disk_evict()
+
+    def _disk_evict(self):
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith('.pickle')]
+        except OSError:
+            return
+        if len(entries) <= self.max_disk_items:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_atime)
+        for entry in entries[:len(entries) - self.max_disk_items]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+
+month_cache = MonthCache()
@@ -0,0 +1,75 @@
+"""Прореживание рядов для графиков.
+
+В браузер не имеет смысла отдавать больше точек, чем пикселей по ширине
+графика. Оба метода оставляют не больше max_points точек и сохраняют
+первую и последнюю точку:
+
+- minmax: ряд режется на равные корзины, из каждой берутся минимум и
+  максимум (в порядке времени) - пики гарантированно остаются;
+- lttb: Largest-Triangle-Three-Buckets, из каждой корзины одна точка,
+  визуально наиболее значимая; форма кривой передается лучше, но
+  одиночный пик может быть сглажен соседним.
+"""
+import numpy as np
+
+
+def bucket_edges(size, buckets):
+    """Границы buckets корзин для точек 1..size-2 (крайние точки отдельно)."""
+    return np.linspace(1, size - 1, buckets + 1).astype(np.int64)
+
+
+def minmax(x, y, max_points):
+    """Индексы точек: минимум и максимум каждой корзины."""
+    size = len(y)
+    if size <= max_points or max_points < 4:
+        return np.arange(size)
+    edges = bucket_edges(size, (max_points - 2) // 2)
+    keep = [0]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi <= lo:
+            continue
+        part = y[lo:hi]
+        pair = sorted({lo + int(np.argmin(part)), lo + int(np.argmax(part))})
+        keep.extend(pair)
+    keep.append(size - 1)
+    return np.asarray(keep, dtype=np.int64)
+
+
+def lttb(x, y, max_points):
+    """Индексы точек по алгоритму Largest-Triangle-Three-Buckets."""
+    size = len(y)
+    if size <= max_points or max_points < 3:
+        return np.arange(size)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = bucket_edges(size, max_points - 2)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = size - 1
+    prev = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_lo, next_hi = edges[i + 1], edges[i + 2]
+        else:
+            next_lo, next_hi = size - 1, size
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[prev] - avg_x) * (y[lo:hi] - y[prev])
+                      - (x[prev] - x[lo:hi]) * (avg_y - y[prev]))
+        prev = lo + int(np.argmax(area))
+        keep[i + 1] = prev
+    return keep
+
+
+METHODS = {'minmax': minmax, 'lttb': lttb}
+
+
+def downsample(frame, max_points, method='minmax'):
+    """Прореженный DataFrame с колонками date, VAL (порядок строк сохраняется)."""
+    if len(frame) <= max_points:
+        return frame
+    x = frame['date'].values.astype('datetime64[ns]').astype(np.int64)
+    y = frame['VAL'].values.astype(np.float64)
+    index = METHODS[method](x, y, max_points)
+    return frame.iloc[index]
@@ -0,0 +1,95 @@
+"""Синтетическая замена Oracle для разработки и замеров.
+
+SQLite-база с теми же представлениями, что и в схеме CNT: BUF_V_INT,
+V_FID_SH и V_LAST_DAY_1. Она подключается как схема CNT, поэтому запросы
+из webapp.energy.queries (с bind-переменными :name) выполняются на ней без
+изменений. FakePool повторяет интерфейс cx_Oracle.SessionPool, который
+использует OraclePool; включается настройкой ORACLE_FAKE_DB.
+"""
+from datetime import datetime, timedelta
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS BUF_V_INT (
+        N_OB INTEGER, N_SH TEXT, N_GR_TY INTEGER,
+        DD_MM_YYYY TIMESTAMP, N_INTER_RAS INTEGER, VAL REAL, RASH_POLN REAL
+    );
+    CREATE INDEX IF NOT EXISTS BUF_V_INT_IDX ON BUF_V_INT (N_OB, N_SH, DD_MM_YYYY);
+    CREATE TABLE IF NOT EXISTS V_FID_SH (
+        N_OB INTEGER, TXT_N_OB_25 TEXT, SYB_RNK INTEGER,
+        N_SH TEXT, N_FID INTEGER, TXT_FID TEXT
+    );
+    CREATE TABLE IF NOT EXISTS V_LAST_DAY_1 (
+        N_OB INTEGER, N_SH TEXT, TXT TEXT, DT TIMESTAMP
+    );
+    """
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+
+
+def build(path, objects=3, meters=10, months=2, start='2018-09-01', seed=0):
+    """Создает базу с objects объектами по meters счетчиков за months месяцев."""
+    rng = np.random.RandomState(seed)
+    first = datetime.strptime(start, '%Y-%m-%d')
+    last = first
+    for _ in range(months):
+        last = datetime(last.year + last.month // 12, last.month % 12 + 1, 1)
+    days = (last - first).days
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    profile = 1.0 + 0.5 * np.sin(np.linspace(0, 2 * np.pi, 48, endpoint=False) - np.pi / 2)
+    for n_ob in range(1, objects + 1):
+        for n_fid in range(1, meters + 1):
+            n_sh = str(n_ob * 1000 + n_fid)
+            conn.execute('INSERT INTO V_FID_SH VALUES (?, ?, 5, ?, ?, ?)',
+                         (n_ob, 'Объект {}'.format(n_ob), n_sh, n_fid, 'Фидер {}'.format(n_fid)))
+            scale = rng.uniform(10, 500)
+            vals = (profile[None, :] * scale * rng.uniform(0.8, 1.2, size=(days, 48))).round(3)
+            rows = ((n_ob, n_sh, 1, (first + timedelta(days=day)).isoformat(' '), slot + 1,
+                     float(vals[day, slot]), 0.0)
+                    for day in range(days) for slot in range(48))
+            conn.executemany('INSERT INTO BUF_V_INT VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            silent_days = int(rng.randint(0, 20))
+            conn.execute('INSERT INTO V_LAST_DAY_1 VALUES (?, ?, ?, ?)',
+                         (n_ob, n_sh, 'Фидер {}'.format(n_fid),
+                          (datetime.now() - timedelta(days=silent_days, hours=int(rng.randint(0, 24)))).isoformat(' ')))
+    conn.commit()
+    conn.close()
+    return path
+
+
+class FakePool:
+    """Минимальный аналог cx_Oracle.SessionPool поверх SQLite-файла."""
+
+    def __init__(self, path, max=10):
+        self.path = path
+        self.min = 0
+        self.max = max
+        self.busy = 0
+        self.opened = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(':memory:', detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        conn.execute('ATTACH DATABASE ? AS CNT', (self.path,))
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self.opened += 1
+            self.busy += 1
+        return conn or self._connect()
+
+    def release(self, conn):
+        with self._lock:
+            self.busy -= 1
+            self._idle.append(conn)
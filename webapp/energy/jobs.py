@@ -0,0 +1,123 @@
+"""Фоновые задачи формирования отчетов.
+
+Задачи выполняются пулом потоков (REPORT_WORKERS), страница опрашивает их
+статус по id. Одинаковые задачи (с тем же ключом), которые еще не
+завершились, не запускаются повторно - возвращается уже существующая.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+import uuid
+
+from webapp.metrics import BACKGROUND_ERRORS
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job:
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def in_flight(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def set_progress(self, progress):
+        self.progress = min(max(progress, 0.0), 1.0)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class JobQueue:
+
+    def __init__(self, app=None):
+        self.workers = 2
+        self.retention = 3600
+        self._app = None
+        self._executor = None
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.workers = app.config.get('REPORT_WORKERS', self.workers)
+        self.retention = app.config.get('REPORT_JOB_RETENTION', self.retention)
+        self._app = app
+        app.extensions['report_jobs'] = self
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix='report-job')
+        return self._executor
+
+    def submit(self, key, func, *args):
+        """Ставит func(job, *args) в очередь; результат func - job.result."""
+        with self._lock:
+            self._purge(time.time())
+            job = self._by_key.get(key)
+            if job is not None and job.in_flight:
+                return job
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+        self.executor.submit(self._run, job, func, args)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, func, args):
+        job.status = RUNNING
+        try:
+            if self._app is not None:
+                with self._app.app_context():
+                    job.result = func(job, *args)
+            else:
+                job.result = func(job, *args)
+            job.progress = 1.0
+            job.status = DONE
+        except Exception as e:
+            logger = self._app.logger if self._app is not None else logging.getLogger(__name__)
+            logger.exception('Задача %s завершилась ошибкой', job.key)
+            BACKGROUND_ERRORS.inc(task='report-job')
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished = time.time()
+
+    def _purge(self, now):
+        stale = [job_id for job_id, job in self._jobs.items()
+                 if job.finished is not None and job.finished + self.retention <= now]
+        for job_id in stale:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+
+
+report_jobs = JobQueue()
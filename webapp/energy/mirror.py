@@ -0,0 +1,192 @@
+"""Локальная копия CNT.BUF_V_INT для закрытых месяцев.
+
+Данные лежат в SQLite, по файлу на объект (MIRROR_DIR/<N_OB>.sqlite).
+Внутри файла одна строка на (счетчик, месяц): матрица float32 (дней, 48)
+и маска пропусков в виде BLOB, то есть ровно то, что нужно HalfHourSeries.
+Синхронизация инкрементальная: для объекта хранится дата, до которой он
+синхронизирован (synced_until), из источника запрашивается только то, что
+новее (с запасом MIRROR_OVERLAP_DAYS на поздние досылки). Отметки
+последнего интервала по счетчикам (watermarks) справочные: по ним не
+выбирается начало догрузки, иначе один замолчавший счетчик заставлял бы
+каждый раз перечитывать объект с даты своего последнего интервала.
+
+Источник подключаемый: любой объект с методами objects() и
+fetch(n_ob, date_start, date_end) -> (N_SH, DD_MM_YYYY, N_INTER_RAS, VAL).
+"""
+from datetime import date, datetime, timedelta
+import os
+import sqlite3
+
+import numpy as np
+
+from webapp.energy.cache import month_key
+from webapp.energy.series import INTERVALS_PER_DAY, HalfHourSeries, month_bounds, split_by_meter
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS months (
+        n_sh TEXT NOT NULL,
+        month TEXT NOT NULL,
+        vals BLOB NOT NULL,
+        missing BLOB NOT NULL,
+        PRIMARY KEY (n_sh, month)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS watermarks (
+        n_sh TEXT PRIMARY KEY,
+        last_day TEXT NOT NULL,
+        last_slot INTEGER NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """
+
+
+class OracleSource:
+    """Источник для синхронизации - сам Oracle."""
+
+    def objects(self):
+        from webapp.energy.reference import feeder_index
+        return list(feeder_index.snapshot.by_object)
+
+    def fetch(self, n_ob, date_start, date_end):
+        from webapp.energy import queries
+        return queries.fetch_object_intervals(n_ob, date_start, date_end)
+
+
+def month_starts(date_start, date_end):
+    """Первые дни месяцев, пересекающихся с [date_start, date_end)."""
+    current = date(date_start.year, date_start.month, 1)
+    while current < date_end:
+        yield current
+        current = date(current.year + current.month // 12, current.month % 12 + 1, 1)
+
+
+class LocalMirror:
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.start = date(2018, 1, 1)
+        self.overlap_days = 2
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.directory = config.get('MIRROR_DIR')
+        self.start = datetime.strptime(config.get('MIRROR_START', '2018-01-01'), '%Y-%m-%d').date()
+        self.overlap_days = config.get('MIRROR_OVERLAP_DAYS', self.overlap_days)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        app.extensions['mirror'] = self
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def _connect(self, n_ob):
+        path = os.path.join(self.directory, '{}.sqlite'.format(str(n_ob).replace(os.sep, '_')))
+        conn = sqlite3.connect(path, timeout=30)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def synced_until(self, n_ob):
+        conn = self._connect(n_ob)
+        try:
+            return self._synced_until(conn)
+        finally:
+            conn.close()
+
+    def _synced_until(self, conn):
+        row = conn.execute("SELECT value FROM meta WHERE key = 'synced_until'").fetchone()
+        return None if row is None else datetime.strptime(row[0], '%Y-%m-%d').date()
+
+    def covers(self, n_ob, month):
+        """Есть ли в копии полный закрытый месяц (с учетом досылок)."""
+        if not self.enabled:
+            return False
+        start, days = month_bounds(month)
+        month_end = start.item() + timedelta(days=days)
+        synced = self.synced_until(n_ob)
+        return synced is not None and synced >= month_end + timedelta(days=self.overlap_days)
+
+    def read_month(self, n_ob, n_sh, month):
+        conn = self._connect(n_ob)
+        try:
+            row = conn.execute('SELECT vals, missing FROM months WHERE n_sh = ? AND month = ?',
+                               (str(n_sh), month_key(month))).fetchone()
+        finally:
+            conn.close()
+        start, days = month_bounds(month)
+        if row is None:
+            return HalfHourSeries.empty(start, days, meter=n_sh)
+        shape = (days, INTERVALS_PER_DAY)
+        values = np.frombuffer(row[0], dtype=np.float32).reshape(shape).copy()
+        missing = np.unpackbits(np.frombuffer(row[1], dtype=np.uint8))[:days * INTERVALS_PER_DAY]
+        return HalfHourSeries(start, values, missing.astype(bool).reshape(shape), n_sh)
+
+    def sync_object(self, source, n_ob, until=None):
+        """Догружает объект из source до until (по умолчанию - до завтра).
+
+        Возвращает число полученных строк.
+        """
+        until = until or date.today() + timedelta(days=1)
+        conn = self._connect(n_ob)
+        try:
+            synced = self._synced_until(conn)
+            if synced is None:
+                since = self.start
+            else:
+                since = max(synced - timedelta(days=self.overlap_days), self.start)
+            fetched = 0
+            for month_start in month_starts(since, until):
+                # по месяцу за запрос, чтобы память не зависела от глубины догрузки
+                chunk_start = max(month_start, since)
+                next_month = date(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1)
+                meters, dates, intervals, vals = source.fetch(
+                    n_ob, datetime.combine(chunk_start, datetime.min.time()),
+                    datetime.combine(min(next_month, until), datetime.min.time()))
+                fetched += len(meters)
+                if meters:
+                    self._merge(conn, month_start.strftime('%Y-%m'),
+                                split_by_meter(month_start.strftime('%Y-%m'), meters, dates, intervals, vals))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('synced_until', ?)",
+                         (min(until, date.today()).isoformat(),))
+            conn.commit()
+        finally:
+            conn.close()
+        return fetched
+
+    def _merge(self, conn, month, by_meter):
+        for meter, series in by_meter.items():
+            row = conn.execute('SELECT vals, missing FROM months WHERE n_sh = ? AND month = ?',
+                               (meter, month)).fetchone()
+            values, missing = series.values, series.missing
+            if row is not None:
+                shape = values.shape
+                old_values = np.frombuffer(row[0], dtype=np.float32).reshape(shape)
+                old_missing = np.unpackbits(np.frombuffer(row[1], dtype=np.uint8))[:values.size]
+                old_missing = old_missing.astype(bool).reshape(shape)
+                values = np.where(missing, old_values, values)
+                missing = missing & old_missing
+            conn.execute('INSERT OR REPLACE INTO months (n_sh, month, vals, missing) VALUES (?, ?, ?, ?)',
+                         (meter, month, values.astype(np.float32).tobytes(), np.packbits(missing).tobytes()))
+            present = np.flatnonzero(~series.missing.ravel())
+            if not len(present):
+                continue
+            last = int(present[-1])
+            mark = ((series.start + last // INTERVALS_PER_DAY).item().isoformat(), last % INTERVALS_PER_DAY + 1)
+            old_mark = conn.execute('SELECT last_day, last_slot FROM watermarks WHERE n_sh = ?', (meter,)).fetchone()
+            if old_mark is None or tuple(old_mark) < mark:
+                conn.execute('INSERT OR REPLACE INTO watermarks (n_sh, last_day, last_slot) VALUES (?, ?, ?)',
+                             (meter,) + mark)
+
+    def sync(self, source, objects=None):
+        """Синхронизирует объекты (по умолчанию - все объекты источника)."""
+        result = {}
+        for n_ob in objects or source.objects():
+            result[str(n_ob)] = self.sync_object(source, n_ob)
+        return result
+
+
+local_mirror = LocalMirror()
@@ -0,0 +1,157 @@
+"""Общий пул сессий Oracle для callback'ов дашборда.
+
+Вместо cx_Oracle.connect() в каждом callback'е сессии берутся из одного
+SessionPool. Настройка NLS выполняется один раз при создании сессии,
+а не перед каждым запросом.
+"""
+from contextlib import contextmanager
+import threading
+import time
+
+try:
+    import cx_Oracle
+except ImportError:  # без клиента Oracle работает только ORACLE_FAKE_DB
+    cx_Oracle = None
+
+from webapp.metrics import ORACLE_ACQUIRE_SECONDS, ORACLE_ERRORS
+
+
+# ошибки базы, которые ловят вызывающие: без cx_Oracle пул - SQLite-замена
+if cx_Oracle is not None:
+    DatabaseError = cx_Oracle.DatabaseError
+else:
+    from sqlite3 import DatabaseError
+
+NLS_SETUP = """
+            ALTER SESSION SET NLS_DATE_FORMAT = 'YYYY-MM-DD HH24:MI:SS'
+            NLS_TIMESTAMP_FORMAT = 'YYYY-MM-DD HH24:MI:SS.FF'
+            """
+
+
+def make_session_callback(stmt_cache_size):
+    def init_session(connection, requested_tag):
+        # кэш разобранных курсоров на стороне клиента: повторные запросы
+        # с теми же bind-переменными идут по пути soft parse
+        connection.stmtcachesize = stmt_cache_size
+        cursor = connection.cursor()
+        cursor.execute(NLS_SETUP)
+        cursor.close()
+    return init_session
+
+
+class OraclePool:
+    """Ленивая обертка над cx_Oracle.SessionPool со статистикой.
+
+    Пул создается при первом запросе соединения, параметры берутся из
+    конфига приложения (ORACLE_POOL_*). Если задан ORACLE_FAKE_DB, вместо
+    Oracle используется SQLite-замена из webapp.energy.fake.
+    """
+
+    def __init__(self, app=None):
+        self._pool = None
+        self._settings = None
+        self._fake_db = None
+        self._lock = threading.Lock()
+        self._acquired = 0
+        self._waits = 0
+        self._failed = 0
+        self._wait_time = 0.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self._settings = {
+            'user': config['USER_NAME'],
+            'password': config['PASSWORD'],
+            'dsn': config['ORACLE_DSN'],
+            'min': config.get('ORACLE_POOL_MIN', 2),
+            'max': config.get('ORACLE_POOL_MAX', 10),
+            'increment': config.get('ORACLE_POOL_INCREMENT', 1),
+            'threaded': True,
+            'getmode': cx_Oracle.SPOOL_ATTRVAL_TIMEDWAIT if cx_Oracle is not None else None,
+            # сколько миллисекунд ждать свободную сессию
+            'waitTimeout': config.get('ORACLE_POOL_ACQUIRE_TIMEOUT', 5000),
+            # через сколько секунд простоя сессия закрывается
+            'timeout': config.get('ORACLE_POOL_IDLE_TIMEOUT', 300),
+            'maxLifetimeSession': config.get('ORACLE_POOL_MAX_LIFETIME', 3600),
+            'sessionCallback': make_session_callback(config.get('ORACLE_STMT_CACHE_SIZE', 40)),
+            'encoding': 'UTF-8',
+            'nencoding': 'UTF-8',
+        }
+        self._fake_db = config.get('ORACLE_FAKE_DB')
+        app.extensions['oracle_pool'] = self
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self._settings is None:
+                        raise RuntimeError('OraclePool не инициализирован, вызовите init_app()')
+                    if self._fake_db:
+                        from webapp.energy.fake import FakePool
+                        self._pool = FakePool(self._fake_db, self._settings['max'])
+                    elif cx_Oracle is None:
+                        raise RuntimeError('cx_Oracle не установлен, а ORACLE_FAKE_DB не задан')
+                    else:
+                        self._pool = cx_Oracle.SessionPool(**self._settings)
+        return self._pool
+
+    def acquire(self):
+        pool = self.pool
+        waited = pool.busy >= pool.max
+        started = time.perf_counter()
+        try:
+            conn = pool.acquire()
+        except DatabaseError:
+            with self._lock:
+                self._failed += 1
+            ORACLE_ERRORS.inc(stage='acquire')
+            raise
+        elapsed = time.perf_counter() - started
+        ORACLE_ACQUIRE_SECONDS.observe(elapsed)
+        with self._lock:
+            self._acquired += 1
+            self._wait_time += elapsed
+            if waited:
+                self._waits += 1
+        return conn
+
+    def release(self, conn):
+        try:
+            self.pool.release(conn)
+        except DatabaseError:
+            # сессия уже разорвана - пул сам ее выкинет
+            pass
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self):
+        with self._lock:
+            result = {
+                'acquired': self._acquired,
+                'waits': self._waits,
+                'failed': self._failed,
+                'wait_time_total': round(self._wait_time, 6),
+                'wait_time_avg': round(self._wait_time / self._acquired, 6) if self._acquired else 0.0,
+            }
+        if self._pool is None:
+            result.update({'opened': 0, 'busy': 0, 'min': None, 'max': None})
+        else:
+            result.update({
+                'opened': self._pool.opened,
+                'busy': self._pool.busy,
+                'min': self._pool.min,
+                'max': self._pool.max,
+            })
+        return result
+
+
+oracle = OraclePool()
@@ -0,0 +1,300 @@
+"""Запросы к CNT.* через bind-переменные.
+
+Текст каждого запроса постоянный, меняются только значения binds, поэтому
+Oracle не разбирает заново запрос под каждый счетчик и месяц, а курсор
+берется из кэша выражений сессии (см. ORACLE_STMT_CACHE_SIZE).
+"""
+from datetime import datetime, timedelta
+import time
+
+import pandas as pd
+
+from webapp.energy.oracle import oracle
+from webapp.metrics import ORACLE_ERRORS, QUERY_ROWS, QUERY_SECONDS
+
+FETCH_ARRAYSIZE = 500
+MAX_IN_LIST = 1000
+
+OBJECTS_SQL = """
+    SELECT DISTINCT
+    N_OB, TXT_N_OB_25
+    FROM
+    CNT.V_FID_SH
+    WHERE SYB_RNK=5
+    {}
+    ORDER BY N_OB
+    """
+
+ALL_COUNTERS_SQL = """
+    SELECT
+    N_OB, N_SH, TXT_FID
+    FROM
+    CNT.V_FID_SH
+    ORDER BY N_OB, N_FID
+    """
+
+MONTH_INTERVALS_SQL = """
+    SELECT
+    DD_MM_YYYY, N_INTER_RAS, VAL
+    FROM
+    CNT.BUF_V_INT
+    WHERE 1=1
+    AND DD_MM_YYYY >= :date_start
+    AND DD_MM_YYYY < :date_end
+    AND N_INTER_RAS BETWEEN 1 AND 48
+    AND N_OB = :n_ob
+    AND N_GR_TY = 1
+    AND N_SH = :n_sh
+    """
+
+METERS_MONTH_INTERVALS_SQL = """
+    SELECT
+    N_SH, DD_MM_YYYY, N_INTER_RAS, VAL
+    FROM
+    CNT.BUF_V_INT
+    WHERE 1=1
+    AND DD_MM_YYYY >= :date_start
+    AND DD_MM_YYYY < :date_end
+    AND N_INTER_RAS BETWEEN 1 AND 48
+    AND N_OB = :n_ob
+    AND N_GR_TY = 1
+    AND N_SH {}
+    """
+
+OBJECT_INTERVALS_RANGE_SQL = """
+    SELECT
+    N_SH, DD_MM_YYYY, N_INTER_RAS, VAL
+    FROM
+    CNT.BUF_V_INT
+    WHERE 1=1
+    AND DD_MM_YYYY >= :date_start
+    AND DD_MM_YYYY < :date_end
+    AND N_INTER_RAS BETWEEN 1 AND 48
+    AND N_OB = :n_ob
+    AND N_GR_TY = 1
+    """
+
+MONTH_DAILY_SQL = """
+    SELECT
+    DD_MM_YYYY, SUM(VAL) AS VAL
+    FROM
+    CNT.BUF_V_INT
+    WHERE 1=1
+    AND DD_MM_YYYY >= :date_start
+    AND DD_MM_YYYY < :date_end
+    AND N_INTER_RAS BETWEEN 1 AND 48
+    AND N_OB = :n_ob
+    AND N_GR_TY = 1
+    AND N_SH = :n_sh
+    GROUP BY DD_MM_YYYY
+    ORDER BY DD_MM_YYYY
+    """
+
+DAY_INTERVALS_SQL = """
+    SELECT
+    DD_MM_YYYY, N_INTER_RAS, VAL
+    FROM
+    CNT.BUF_V_INT
+    WHERE 1=1
+    AND DD_MM_YYYY >= :day_start
+    AND DD_MM_YYYY < :day_end
+    AND N_INTER_RAS BETWEEN 1 AND 48
+    AND N_OB = :n_ob
+    AND N_GR_TY = 1
+    AND N_SH = :n_sh
+    """
+
+EXPORT_INTERVALS_SQL = """
+    SELECT
+    N_SH, DD_MM_YYYY, N_INTER_RAS, VAL
+    FROM
+    CNT.BUF_V_INT
+    WHERE 1=1
+    AND DD_MM_YYYY >= :date_start
+    AND DD_MM_YYYY < :date_end
+    AND N_INTER_RAS BETWEEN 1 AND 48
+    AND N_OB = :n_ob
+    AND N_GR_TY = 1
+    {}
+    ORDER BY N_SH, DD_MM_YYYY, N_INTER_RAS
+    """
+
+ALL_LAST_DAY_SQL = """
+    SELECT
+    N_OB, N_SH, TXT, DT
+    FROM
+    CNT.V_LAST_DAY_1
+    """
+
+
+def in_clause(name, values):
+    """Строит 'IN (:name0, :name1, ...)' и словарь binds.
+
+    Число binds округляется вверх до степени двойки (последнее значение
+    повторяется), чтобы разных текстов запроса было несколько, а не по
+    одному на каждую длину списка, но не больше MAX_IN_LIST - предела
+    Oracle (ORA-01795). Повторы значений отбрасываются; пустой список и
+    список длиннее MAX_IN_LIST - ValueError.
+    """
+    values = list(dict.fromkeys(values))
+    if not values:
+        raise ValueError('Пустой список для IN')
+    if len(values) > MAX_IN_LIST:
+        raise ValueError('Больше {} значений для IN'.format(MAX_IN_LIST))
+    size = 1
+    while size < len(values):
+        size *= 2
+    size = min(size, MAX_IN_LIST)
+    padded = values + [values[-1]] * (size - len(values))
+    names = ['{}{}'.format(name, i) for i in range(size)]
+    sql = 'IN ({})'.format(', '.join(':' + n for n in names))
+    return sql, dict(zip(names, padded))
+
+
+def read_rows(sql, params=None, name='query'):
+    """Выполняет запрос и возвращает (имена колонок, список строк).
+
+    name - метка запроса в метриках.
+    """
+    with oracle.connection() as conn:
+        cursor = conn.cursor()
+        started = time.perf_counter()
+        try:
+            cursor.arraysize = FETCH_ARRAYSIZE
+            cursor.execute(sql, params or {})
+            columns = [d[0] for d in cursor.description]
+            rows = cursor.fetchall()
+        except Exception:
+            ORACLE_ERRORS.inc(stage='query')
+            raise
+        finally:
+            cursor.close()
+            QUERY_SECONDS.observe(time.perf_counter() - started, query=name)
+    QUERY_ROWS.inc(len(rows), query=name)
+    return columns, rows
+
+
+def iter_batches(sql, params=None, name='query', batch_size=FETCH_ARRAYSIZE):
+    """Генератор: сначала имена колонок, затем списки строк по batch_size.
+
+    Сессия Oracle занята, пока генератор не исчерпан или не закрыт, зато
+    в памяти одновременно только одна пачка строк.
+    """
+    with oracle.connection() as conn:
+        cursor = conn.cursor()
+        started = time.perf_counter()
+        fetched = 0
+        try:
+            cursor.arraysize = batch_size
+            cursor.execute(sql, params or {})
+            yield [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                fetched += len(rows)
+                yield rows
+        except Exception:
+            ORACLE_ERRORS.inc(stage='query')
+            raise
+        finally:
+            cursor.close()
+            QUERY_SECONDS.observe(time.perf_counter() - started, query=name)
+            QUERY_ROWS.inc(fetched, query=name)
+
+
+def read_frame(sql, params=None, name='query'):
+    columns, rows = read_rows(sql, params, name)
+    return pd.DataFrame.from_records(rows, columns=columns)
+
+
+def read_columns(sql, params=None, name='query'):
+    """Результат запроса по столбцам: кортеж последовательностей."""
+    columns, rows = read_rows(sql, params, name)
+    if not rows:
+        return tuple(() for _ in columns)
+    return tuple(zip(*rows))
+
+
+def month_range(month):
+    """'2018-10' или '2018-10-10...' -> binds date_start/date_end границ месяца.
+
+    Сравнение DD_MM_YYYY с датами, а не LIKE по строке, позволяет Oracle
+    использовать индекс и отсекать секции BUF_V_INT.
+    """
+    year, month_number = int(month[:4]), int(month[5:7])
+    date_start = datetime(year, month_number, 1)
+    date_end = datetime(year + month_number // 12, month_number % 12 + 1, 1)
+    return {'date_start': date_start, 'date_end': date_end}
+
+
+def fetch_objects(objects=None):
+    """Объекты (N_OB, TXT_N_OB_25); objects=None - все объекты."""
+    if objects is None:
+        return read_frame(OBJECTS_SQL.format(''), name='objects')
+    if not objects:
+        return pd.DataFrame(columns=['N_OB', 'TXT_N_OB_25'])
+    clause, params = in_clause('n_ob', objects)
+    return read_frame(OBJECTS_SQL.format('AND N_OB ' + clause), params, name='objects')
+
+
+def fetch_all_counters():
+    """Столбцы N_OB, N_SH, TXT_FID всех фидеров, по порядку N_FID внутри объекта."""
+    return read_columns(ALL_COUNTERS_SQL, name='all_counters')
+
+
+def fetch_month_intervals(n_ob, n_sh, month):
+    """Столбцы DD_MM_YYYY, N_INTER_RAS, VAL получасовок счетчика за месяц."""
+    params = dict(month_range(month), n_ob=n_ob, n_sh=n_sh)
+    return read_columns(MONTH_INTERVALS_SQL, params, name='month_intervals')
+
+
+def fetch_object_month_intervals(n_ob, month):
+    """Столбцы N_SH, DD_MM_YYYY, N_INTER_RAS, VAL всех счетчиков объекта за месяц."""
+    bounds = month_range(month)
+    return fetch_object_intervals(n_ob, bounds['date_start'], bounds['date_end'])
+
+
+def fetch_meters_month_intervals(n_ob, meters, month):
+    """Столбцы N_SH, DD_MM_YYYY, N_INTER_RAS, VAL нескольких счетчиков за месяц."""
+    clause, params = in_clause('n_sh', meters)
+    params.update(month_range(month), n_ob=n_ob)
+    return read_columns(METERS_MONTH_INTERVALS_SQL.format(clause), params, name='meters_month_intervals')
+
+
+def fetch_object_intervals(n_ob, date_start, date_end):
+    """Столбцы N_SH, DD_MM_YYYY, N_INTER_RAS, VAL объекта за [date_start, date_end)."""
+    params = {'date_start': date_start, 'date_end': date_end, 'n_ob': n_ob}
+    return read_columns(OBJECT_INTERVALS_RANGE_SQL, params, name='object_intervals')
+
+
+def fetch_month_daily(n_ob, n_sh, month):
+    """Столбцы DD_MM_YYYY, VAL: суточные суммы, посчитанные в Oracle."""
+    params = dict(month_range(month), n_ob=n_ob, n_sh=n_sh)
+    return read_columns(MONTH_DAILY_SQL, params, name='month_daily')
+
+
+def fetch_day_intervals(n_ob, n_sh, day):
+    """Столбцы DD_MM_YYYY, N_INTER_RAS, VAL за одни сутки (day - datetime.date)."""
+    day_start = datetime(day.year, day.month, day.day)
+    params = {'day_start': day_start, 'day_end': day_start + timedelta(days=1), 'n_ob': n_ob, 'n_sh': n_sh}
+    return read_columns(DAY_INTERVALS_SQL, params, name='day_intervals')
+
+
+def iter_intervals(n_ob, date_start, date_end, meters=None, batch_size=FETCH_ARRAYSIZE):
+    """Получасовки объекта за [date_start, date_end) пачками (см. iter_batches).
+
+    meters - номера счетчиков; None - все счетчики объекта.
+    """
+    params = {'date_start': date_start, 'date_end': date_end, 'n_ob': n_ob}
+    clause = ''
+    if meters:
+        clause, meter_params = in_clause('n_sh', meters)
+        clause = 'AND N_SH ' + clause
+        params.update(meter_params)
+    return iter_batches(EXPORT_INTERVALS_SQL.format(clause), params, 'export_intervals', batch_size)
+
+
+def fetch_all_last_day():
+    """Время последних данных по всем счетчикам всех объектов."""
+    return read_frame(ALL_LAST_DAY_SQL, name='all_last_day')
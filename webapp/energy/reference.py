@@ -0,0 +1,211 @@
+"""Справочники из Oracle, которые держатся в памяти процесса.
+
+Справочник загружается при старте, обновляется в фоне раз в
+REFERENCE_REFRESH_INTERVAL секунд и по запросу (refresh()). Новый снимок
+строится целиком и подменяет старый одной операцией, поэтому читатели
+всегда видят согласованные данные без блокировок.
+"""
+from collections import namedtuple
+from datetime import datetime
+import logging
+import threading
+import time
+
+import numpy as np
+
+from webapp.energy import queries
+from webapp.metrics import BACKGROUND_ERRORS, ORACLE_ERRORS
+
+
+class ReferenceData:
+    name = 'reference'
+    interval_key = 'REFERENCE_REFRESH_INTERVAL'
+    default_interval = 3600
+
+    def __init__(self, app=None):
+        self.interval = self.default_interval
+        self.version = 0
+        self.loaded_at = None
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._logger = logging.getLogger(__name__)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.interval = app.config.get(self.interval_key, self.interval)
+        self._logger = app.logger
+        app.extensions.setdefault('reference_data', {})[self.name] = self
+
+    def load(self):
+        raise NotImplementedError
+
+    def refresh(self):
+        snapshot = self.load()
+        with self._lock:
+            self._snapshot = snapshot
+            self.version += 1
+            self.loaded_at = time.time()
+        return snapshot
+
+    @property
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshot
+            if snapshot is None:
+                snapshot = self.refresh()
+        return snapshot
+
+    def start(self):
+        """Фоновое обновление: сразу и далее каждые interval секунд."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='refresh-' + self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception:
+                # читатели продолжают видеть прежний снимок - ошибку должно быть видно
+                self._logger.exception('Не удалось обновить справочник %s', self.name)
+                ORACLE_ERRORS.inc(stage='refresh')
+                BACKGROUND_ERRORS.inc(task='refresh-' + self.name)
+            time.sleep(self.interval)
+
+    def info(self):
+        return {'version': self.version, 'loaded_at': self.loaded_at}
+
+
+class ObjectCatalogue(ReferenceData):
+    """Список объектов (N_OB, TXT_N_OB_25) для выпадающего списка."""
+    name = 'objects'
+
+    def __init__(self, app=None):
+        self._options_cache = {}
+        super().__init__(app)
+
+    def load(self):
+        frame = queries.fetch_objects()
+        options = tuple({'value': value, 'label': label}
+                        for value, label in zip(frame['N_OB'].tolist(), frame['TXT_N_OB_25'].tolist()))
+        return options
+
+    def options(self, objects=None):
+        """Опции dropdown; objects=None - все объекты (админ), иначе только перечисленные."""
+        # версия читается до снимка: при гонке с refresh() под старой версией
+        # окажутся новые опции, но не наоборот
+        version = self.version
+        snapshot = self.snapshot
+        if objects is None:
+            return list(snapshot)
+        key = (version, frozenset(objects))
+        options = self._options_cache.get(key)
+        if options is None:
+            options = [option for option in snapshot if str(option['value']) in key[1]]
+            if len(self._options_cache) > 1000:
+                self._options_cache = {}
+            self._options_cache[key] = options
+        return list(options)
+
+    def refresh(self):
+        snapshot = super().refresh()
+        self._options_cache = {}
+        return snapshot
+
+    def options_for(self, user):
+        return self.options(None if user.is_admin else user.objects)
+
+
+object_catalogue = ObjectCatalogue()
+
+
+FeederSnapshot = namedtuple('FeederSnapshot', ['version', 'by_object', 'object_of'])
+
+
+class FeederIndex(ReferenceData):
+    """Фидеры объектов из V_FID_SH.
+
+    by_object: N_OB -> кортеж (N_SH, TXT_FID) в порядке N_FID,
+    object_of: N_SH -> N_OB. Ключи - строки.
+    """
+    name = 'feeders'
+
+    def load(self):
+        objects, meters, names = queries.fetch_all_counters()
+        by_object = {}
+        object_of = {}
+        for n_ob, n_sh, name in zip(objects, meters, names):
+            by_object.setdefault(str(n_ob), []).append((n_sh, name))
+            object_of[str(n_sh)] = str(n_ob)
+        return FeederSnapshot(self.version + 1,
+                              {n_ob: tuple(feeders) for n_ob, feeders in by_object.items()},
+                              object_of)
+
+    def feeders(self, n_ob):
+        return self.snapshot.by_object.get(str(n_ob), ())
+
+    def options(self, n_ob):
+        return [{'value': n_sh, 'label': name} for n_sh, name in self.feeders(n_ob)]
+
+    def object_of(self, n_sh):
+        return self.snapshot.object_of.get(str(n_sh))
+
+
+feeder_index = FeederIndex()
+
+
+STALE_COLUMN = 'Дней нет данных'
+LastDaySnapshot = namedtuple('LastDaySnapshot', ['taken_at', 'frame', 'by_object'])
+
+
+def days_label(days):
+    """Вектор чисел -> '1 день', '2 дня', '5 дней'."""
+    mod10 = days % 10
+    mod100 = days % 100
+    forms = np.where((mod10 == 1) & (mod100 != 11), 'день',
+                     np.where((mod10 >= 2) & (mod10 <= 4) & ((mod100 < 10) | (mod100 >= 20)), 'дня', 'дней'))
+    return days.astype(str) + ' ' + forms
+
+
+def staleness(last_dt, now):
+    """Сколько нет данных: (целых дней, подпись вида '3 дня 05 ч.')."""
+    delta = now - last_dt
+    known = delta.notna()
+    days = delta.dt.days.fillna(0).astype(np.int64)
+    hours = (delta.dt.seconds.fillna(0) // 3600).astype(np.int64)
+    label = days_label(days) + ' ' + hours.astype(str).str.zfill(2) + ' ч.'
+    return days.where(known), label.where(known, '')
+
+
+class LastDataTable(ReferenceData):
+    """Снимок V_LAST_DAY_1 по всем объектам с посчитанной давностью данных."""
+    name = 'last_day'
+    interval_key = 'LAST_DAY_REFRESH_INTERVAL'
+    default_interval = 300
+
+    def load(self):
+        frame = queries.fetch_all_last_day()
+        now = datetime.now()
+        frame['STALE_DAYS'], frame[STALE_COLUMN] = staleness(frame['DT'], now)
+        by_object = {str(n_ob): group.drop(columns='STALE_DAYS').to_dict('records')
+                     for n_ob, group in frame.groupby('N_OB', sort=False)}
+        return LastDaySnapshot(now, frame, by_object)
+
+    def for_object(self, n_ob):
+        return self.snapshot.by_object.get(str(n_ob), [])
+
+    def silent(self, min_days, objects=None):
+        """Счетчики без данных дольше min_days дней; objects - фильтр по N_OB."""
+        frame = self.snapshot.frame
+        mask = frame['STALE_DAYS'] >= min_days
+        if objects is not None:
+            mask &= frame['N_OB'].astype(str).isin(list(objects))
+        return frame[mask].sort_values('STALE_DAYS', ascending=False).drop(columns='STALE_DAYS').to_dict('records')
+
+
+last_data_table = LastDataTable()
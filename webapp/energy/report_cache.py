@@ -0,0 +1,149 @@
+"""Кэш готовых отчетов с адресацией по содержимому.
+
+Ключ отчета - хэш от вида отчета, объекта, счетчика, месяца и версии
+данных, поэтому одинаковые запросы получают один и тот же файл, а разные
+пользователи не затирают отчеты друг друга. Отчеты держатся в памяти
+(REPORT_CACHE_MEMORY_BYTES) и, если задан REPORT_CACHE_DIR, на диске.
+Диск ограничен по размеру (REPORT_CACHE_MAX_BYTES) и возрасту файлов
+(REPORT_CACHE_MAX_AGE).
+"""
+from collections import OrderedDict
+import hashlib
+from io import BytesIO
+import os
+import tempfile
+import threading
+import time
+
+SUFFIX = '.xlsx'
+
+
+def report_key(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def is_key(key):
+    return len(key) == 40 and all(c in '0123456789abcdef' for c in key)
+
+
+class ReportCache:
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.max_bytes = 500 * 1024 * 1024
+        self.max_age = 7 * 24 * 3600
+        self.memory_bytes = 64 * 1024 * 1024
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.directory = config.get('REPORT_CACHE_DIR', os.path.join(os.getcwd(), 'downloads'))
+        self.max_bytes = config.get('REPORT_CACHE_MAX_BYTES', self.max_bytes)
+        self.max_age = config.get('REPORT_CACHE_MAX_AGE', self.max_age)
+        self.memory_bytes = config.get('REPORT_CACHE_MEMORY_BYTES', self.memory_bytes)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        app.extensions['report_cache'] = self
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._memory:
+                return True
+        return bool(self.directory) and os.path.exists(self._path(key))
+
+    def get(self, key):
+        """Содержимое отчета или None."""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            # только время доступа (для LRU); mtime остается временем создания для REPORT_CACHE_MAX_AGE
+            os.utime(path, (time.time(), os.path.getmtime(path)))
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def open(self, key):
+        """Файловый объект для отдачи отчета; из памяти, если он там есть."""
+        data = self.get(key)
+        return None if data is None else BytesIO(data)
+
+    def put(self, key, data):
+        self._remember(key, data)
+        if not self.directory:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self.evict()
+
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= len(old)
+            self._memory[key] = data
+            self._memory_size += len(data)
+            while self._memory_size > self.memory_bytes:
+                _, dropped = self._memory.popitem(last=False)
+                self._memory_size -= len(dropped)
+
+    def evict(self):
+        """Удаляет с диска старые отчеты и самые давно запрошенные сверх лимита."""
+        if not self.directory:
+            return
+        now = time.time()
+        files = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError:
+            return
+        for entry in entries:
+            if not entry.name.endswith(SUFFIX) or not is_key(entry.name[:-len(SUFFIX)]):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if stat.st_mtime + self.max_age <= now:
+                self._remove(entry.path)
+            else:
+                files.append((stat.st_atime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+report_cache = ReportCache()
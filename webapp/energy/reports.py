@@ -0,0 +1,192 @@
+"""Формирование xlsx-отчетов по шаблону.
+
+Шаблон (REPORT_TEMPLATE_PATH) разбирается один раз: значения, стили,
+объединенные ячейки и размеры колонок запоминаются в памяти. Каждый отчет
+пишется потоково в write-only книгу, без повторного чтения шаблона с диска
+и без поячеечных обращений к полной модели листа.
+"""
+from copy import copy
+from io import BytesIO
+import os
+import threading
+import time
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+
+from webapp.energy.cache import month_key
+from webapp.energy.data import load_month_series, load_object_month
+from webapp.energy.report_cache import report_cache, report_key
+from webapp.metrics import REPORT_SECONDS
+
+DATA_FIRST_ROW = 10
+DATA_FIRST_COLUMN = 2
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class TemplateSnapshot:
+    """Неизменяемый слепок листа шаблона."""
+
+    def __init__(self, ws):
+        self.title = ws.title
+        self.max_row = ws.max_row
+        self.max_column = ws.max_column
+        self.cells = {}
+        for row in ws.iter_rows():
+            for cell in row:
+                if cell.value is None and not cell.has_style:
+                    continue
+                self.cells[(cell.row, cell.column)] = (
+                    cell.value,
+                    copy(cell.font), copy(cell.border), copy(cell.fill),
+                    cell.number_format, copy(cell.alignment), copy(cell.protection),
+                ) if cell.has_style else (cell.value,)
+        self.merged = [str(cell_range) for cell_range in ws.merged_cells.ranges]
+        self.column_widths = {key: dim.width for key, dim in ws.column_dimensions.items() if dim.width}
+        self.row_heights = {key: dim.height for key, dim in ws.row_dimensions.items() if dim.height}
+
+    def cell(self, ws, row, column, value=None):
+        spec = self.cells.get((row, column))
+        if spec is None:
+            return value
+        out = WriteOnlyCell(ws, value=spec[0] if value is None else value)
+        if len(spec) > 1:
+            out.font, out.border, out.fill, out.number_format, out.alignment, out.protection = spec[1:]
+        return out
+
+
+class ReportRenderer:
+
+    def __init__(self, app=None):
+        self.template_path = None
+        self._snapshot = None
+        self._mtime = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.template_path = app.config.get('REPORT_TEMPLATE_PATH', '/home/alex/template.xlsx')
+        app.extensions['report_renderer'] = self
+
+    def snapshot(self):
+        """Слепок шаблона; перечитывается, только если файл поменялся."""
+        mtime = os.path.getmtime(self.template_path)
+        if self._snapshot is None or mtime != self._mtime:
+            with self._lock:
+                if self._snapshot is None or mtime != self._mtime:
+                    wb = openpyxl.load_workbook(self.template_path)
+                    self._snapshot = TemplateSnapshot(wb.active)
+                    self._mtime = mtime
+                    wb.close()
+        return self._snapshot
+
+    def template_version(self):
+        return os.path.getmtime(self.template_path)
+
+    def write_sheet(self, wb, snapshot, rows, title=None):
+        """Лист по шаблону; rows - {номер строки: список значений с колонки B}."""
+        ws = wb.create_sheet(title or snapshot.title)
+        for key, width in snapshot.column_widths.items():
+            ws.column_dimensions[key].width = width
+        for key, height in snapshot.row_heights.items():
+            ws.row_dimensions[key].height = height
+        for cell_range in snapshot.merged:
+            ws.merged_cells.add(cell_range)
+        last_row = max([snapshot.max_row] + list(rows))
+        last_column = snapshot.max_column
+        for values in rows.values():
+            last_column = max(last_column, DATA_FIRST_COLUMN + len(values) - 1)
+        for r_idx in range(1, last_row + 1):
+            values = rows.get(r_idx, ())
+            line = []
+            for c_idx in range(1, last_column + 1):
+                v_idx = c_idx - DATA_FIRST_COLUMN
+                value = values[v_idx] if 0 <= v_idx < len(values) else None
+                line.append(snapshot.cell(ws, r_idx, c_idx, value))
+            ws.append(line)
+        return ws
+
+    def render_month(self, series):
+        """Почасовой отчет за месяц по одному счетчику, возвращает xlsx в байтах."""
+        started = time.perf_counter()
+        hourly = series.hourly()
+        rows = {DATA_FIRST_ROW + day_idx: hourly[day_idx].tolist()
+                for day_idx in series.has_data().nonzero()[0].tolist()}
+        wb = openpyxl.Workbook(write_only=True)
+        self.write_sheet(wb, self.snapshot(), rows)
+        buffer = BytesIO()
+        wb.save(buffer)
+        REPORT_SECONDS.observe(time.perf_counter() - started, kind='month')
+        return buffer.getvalue()
+
+    def render_object(self, feeders):
+        """Отчет по объекту: сводный лист и по листу на каждый фидер.
+
+        feeders - список (N_SH, название фидера, HalfHourSeries).
+        """
+        started = time.perf_counter()
+        snapshot = self.snapshot()
+        wb = openpyxl.Workbook(write_only=True)
+        summary = wb.create_sheet('Сводка')
+        days = feeders[0][2].days if feeders else 0
+        summary.append(['Фидер', 'Счетчик', 'Итого'] + list(range(1, days + 1)))
+        for meter, name, series in feeders:
+            daily = series.daily()
+            summary.append([name, meter, float(daily.sum())] + daily.tolist())
+        titles = set()
+        for meter, name, series in feeders:
+            hourly = series.hourly()
+            rows = {DATA_FIRST_ROW + day_idx: hourly[day_idx].tolist()
+                    for day_idx in series.has_data().nonzero()[0].tolist()}
+            self.write_sheet(wb, snapshot, rows, sheet_title(name, meter, titles))
+        buffer = BytesIO()
+        wb.save(buffer)
+        REPORT_SECONDS.observe(time.perf_counter() - started, kind='object')
+        return buffer.getvalue()
+
+
+def sheet_title(name, meter, used):
+    """Допустимое и уникальное в книге имя листа (до 31 символа)."""
+    title = ''.join(c for c in '{} {}'.format(name, meter) if c not in '[]:*?/\\').strip()[:31] or str(meter)
+    candidate, n = title, 1
+    while candidate.lower() in used:
+        suffix = ' ({})'.format(n)
+        candidate = title[:31 - len(suffix)] + suffix
+        n += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+report_renderer = ReportRenderer()
+
+
+def download_url(key, filename):
+    return '/downloads/{}/{}'.format(key, filename)
+
+
+def month_report_task(job, n_ob, n_sh, month):
+    """Фоновая задача: отчет за месяц по счетчику, результат - ссылка для скачивания.
+
+    Если отчет с той же версией данных и шаблона уже есть в кэше, он не
+    формируется заново.
+    """
+    series = load_month_series(n_ob, n_sh, month)
+    job.set_progress(0.5)
+    key = report_key('month', n_ob, n_sh, month_key(month), series.fingerprint(),
+                     report_renderer.template_version())
+    if key not in report_cache:
+        report_cache.put(key, report_renderer.render_month(series))
+    return download_url(key, '{}-{}.xlsx'.format(n_sh, month_key(month)))
+
+
+def object_report_task(job, n_ob, month):
+    """Фоновая задача: отчет по всем фидерам объекта за месяц."""
+    feeders = load_object_month(n_ob, month)
+    job.set_progress(0.5)
+    key = report_key('object', n_ob, month_key(month),
+                     ','.join(series.fingerprint() for _, _, series in feeders),
+                     report_renderer.template_version())
+    if key not in report_cache:
+        report_cache.put(key, report_renderer.render_object(feeders))
+    return download_url(key, '{}-{}.xlsx'.format(n_ob, month_key(month)))
@@ -0,0 +1,192 @@
+"""Компактное представление получасовых данных счетчика.
+
+Месяц (или любой набор суток) хранится матрицей float32 размером
+(дней, 48) с датой первого дня и маской пропусков. Матрица строится прямо
+из целых N_INTER_RAS без строковых преобразований, часовые и суточные
+суммы - это свертки по осям массива.
+"""
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+INTERVALS_PER_DAY = 48
+HALF_HOUR = np.timedelta64(30, 'm')
+
+
+def month_bounds(month):
+    """'2018-10' -> (datetime64 первого дня, число дней в месяце)."""
+    first = np.datetime64(str(month)[:7], 'M')
+    start = first.astype('datetime64[D]')
+    end = (first + 1).astype('datetime64[D]')
+    return start, int((end - start).astype(int))
+
+
+class HalfHourSeries:
+    __slots__ = ('start', 'values', 'missing', 'meter')
+
+    def __init__(self, start, values, missing=None, meter=None):
+        self.start = np.datetime64(start, 'D')
+        self.values = np.asarray(values, dtype=np.float32)
+        if missing is None:
+            missing = np.zeros(self.values.shape, dtype=bool)
+        self.missing = missing
+        self.meter = meter
+
+    @classmethod
+    def empty(cls, start, days, meter=None):
+        values = np.zeros((days, INTERVALS_PER_DAY), dtype=np.float32)
+        missing = np.ones((days, INTERVALS_PER_DAY), dtype=bool)
+        return cls(start, values, missing, meter)
+
+    @classmethod
+    def from_intervals(cls, dates, intervals, vals, start=None, days=None, meter=None):
+        """Строит ряд из столбцов DD_MM_YYYY, N_INTER_RAS (1..48) и VAL.
+
+        start/days задают диапазон матрицы; по умолчанию - от первой до
+        последней даты в выборке. Строки за пределами диапазона и с
+        номером интервала вне 1..48 отбрасываются, повторы суммируются.
+        """
+        day = pd.to_datetime(pd.Index(dates)).values.astype('datetime64[D]')
+        slot = np.asarray(intervals, dtype=np.int64) - 1
+        vals = np.asarray(vals, dtype=np.float64)
+        if start is None:
+            if not len(day):
+                raise ValueError('Нет данных и не задан начальный день')
+            start = day.min()
+        start = np.datetime64(start, 'D')
+        if days is None:
+            days = int((day.max() - start).astype(int)) + 1 if len(day) else 0
+        row = (day - start).astype(np.int64)
+        keep = (row >= 0) & (row < days) & (slot >= 0) & (slot < INTERVALS_PER_DAY) & ~np.isnan(vals)
+        flat = row[keep] * INTERVALS_PER_DAY + slot[keep]
+        totals = np.zeros(days * INTERVALS_PER_DAY, dtype=np.float64)
+        np.add.at(totals, flat, vals[keep])
+        filled = np.zeros(days * INTERVALS_PER_DAY, dtype=bool)
+        filled[flat] = True
+        shape = (days, INTERVALS_PER_DAY)
+        return cls(start, totals.astype(np.float32).reshape(shape), ~filled.reshape(shape), meter)
+
+    @classmethod
+    def for_month(cls, month, dates, intervals, vals, meter=None):
+        start, days = month_bounds(month)
+        return cls.from_intervals(dates, intervals, vals, start=start, days=days, meter=meter)
+
+    @classmethod
+    def concat(cls, parts, meter=None):
+        """Склейка рядов, идущих подряд по дням (например, по месяцам)."""
+        parts = list(parts)
+        return cls(parts[0].start,
+                   np.concatenate([part.values for part in parts]),
+                   np.concatenate([part.missing for part in parts]),
+                   meter if meter is not None else parts[0].meter)
+
+    @property
+    def days(self):
+        return self.values.shape[0]
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.missing.nbytes
+
+    def fingerprint(self):
+        """Версия данных: хэш значений и маски пропусков."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(self.start).encode())
+        digest.update(self.values.tobytes())
+        digest.update(np.packbits(self.missing).tobytes())
+        return digest.hexdigest()
+
+    def day_dates(self):
+        return self.start + np.arange(self.days)
+
+    def has_data(self):
+        """Булев массив по дням: есть ли хотя бы один интервал."""
+        return ~self.missing.all(axis=1)
+
+    def halfhourly(self):
+        return self.values
+
+    def hourly(self):
+        """Матрица (дней, 24) часовых сумм."""
+        return self.values.reshape(self.days, 24, 2).sum(axis=2, dtype=np.float64)
+
+    def daily(self):
+        return self.values.sum(axis=1, dtype=np.float64)
+
+    def day_index(self, day):
+        index = int((np.datetime64(day, 'D') - self.start).astype(int))
+        if not 0 <= index < self.days:
+            raise IndexError(day)
+        return index
+
+    def to_frame(self, freq='30min', only_present=True):
+        """DataFrame с колонками date, VAL (и N_SH) для графиков.
+
+        freq: '30min', 'H' или 'D'. При only_present пропущенные точки
+        не попадают в результат.
+        """
+        if freq == 'D':
+            dates = self.day_dates().astype('datetime64[ns]')
+            values = self.daily()
+            present = self.has_data()
+        elif freq == 'H':
+            dates = (self.day_dates().astype('datetime64[m]')[:, None]
+                     + np.arange(24) * np.timedelta64(60, 'm')).ravel()
+            values = self.hourly().ravel()
+            present = (~self.missing.reshape(self.days, 24, 2).all(axis=2)).ravel()
+        else:
+            dates = (self.day_dates().astype('datetime64[m]')[:, None]
+                     + np.arange(INTERVALS_PER_DAY) * HALF_HOUR).ravel()
+            values = self.values.ravel().astype(np.float64)
+            present = ~self.missing.ravel()
+        if only_present:
+            dates = dates[present]
+            values = values[present]
+        frame = pd.DataFrame({'date': dates.astype('datetime64[ns]'), 'VAL': values})
+        if self.meter is not None:
+            frame.insert(0, 'N_SH', self.meter)
+        return frame
+
+    def slice_days(self, start, end):
+        """Часть ряда за дни [start, end), обрезанная по границам ряда."""
+        first = max(int((np.datetime64(start, 'D') - self.start).astype(int)), 0)
+        last = min(int((np.datetime64(end, 'D') - self.start).astype(int)), self.days)
+        last = max(last, first)
+        return HalfHourSeries(self.start + first, self.values[first:last],
+                              self.missing[first:last], self.meter)
+
+    def day_frame(self, day):
+        """Получасовой профиль одних суток."""
+        index = self.day_index(day)
+        part = HalfHourSeries(self.start + index, self.values[index:index + 1],
+                              self.missing[index:index + 1], self.meter)
+        return part.to_frame('30min')
+
+
+def split_by_meter(month, meters, dates, intervals, vals):
+    """Разбивает выборку по нескольким счетчикам на ряды за месяц.
+
+    Все счетчики раскладываются одной операцией в массив
+    (счетчиков, дней, 48); возвращается {N_SH: HalfHourSeries}.
+    """
+    start, days = month_bounds(month)
+    meter_ids, meter_idx = np.unique(np.asarray([str(m) for m in meters], dtype=object), return_inverse=True)
+    if not len(meter_ids):
+        return {}
+    day = pd.to_datetime(pd.Index(dates)).values.astype('datetime64[D]')
+    row = (day - start).astype(np.int64)
+    slot = np.asarray(intervals, dtype=np.int64) - 1
+    vals = np.asarray(vals, dtype=np.float64)
+    keep = (row >= 0) & (row < days) & (slot >= 0) & (slot < INTERVALS_PER_DAY) & ~np.isnan(vals)
+    flat = (meter_idx[keep] * days + row[keep]) * INTERVALS_PER_DAY + slot[keep]
+    size = len(meter_ids) * days * INTERVALS_PER_DAY
+    totals = np.zeros(size, dtype=np.float64)
+    np.add.at(totals, flat, vals[keep])
+    filled = np.zeros(size, dtype=bool)
+    filled[flat] = True
+    shape = (len(meter_ids), days, INTERVALS_PER_DAY)
+    values = totals.astype(np.float32).reshape(shape)
+    missing = ~filled.reshape(shape)
+    return {meter: HalfHourSeries(start, values[i], missing[i], meter)
+            for i, meter in enumerate(meter_ids.tolist())}
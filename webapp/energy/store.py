@@ -0,0 +1,117 @@
+"""Серверное хранилище датасетов для callback'ов дашборда.
+
+В скрытый div страницы кладется только короткий ключ (handle), а сами
+DataFrame'ы лежат здесь. Записи, к которым не обращались дольше
+DATASET_TTL секунд, удаляются. Когда в памяти больше DATASET_MAX_ITEMS
+записей, самые старые сбрасываются на диск в DATASET_SPILL_DIR (если он
+задан) или удаляются.
+"""
+from collections import OrderedDict
+import os
+import pickle
+import threading
+import time
+import uuid
+
+
+class DatasetStore:
+
+    def __init__(self, app=None):
+        self.ttl = 3600
+        self.max_items = 200
+        self.spill_dir = None
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.ttl = config.get('DATASET_TTL', self.ttl)
+        self.max_items = config.get('DATASET_MAX_ITEMS', self.max_items)
+        self.spill_dir = config.get('DATASET_SPILL_DIR')
+        if self.spill_dir:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        app.extensions['dataset_store'] = self
+
+    def put(self, value):
+        handle = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._items[handle] = (now, value)
+            spilled = self._trim(now)
+        for old_handle, old_value in spilled:
+            self._spill(old_handle, old_value)
+        return handle
+
+    def get(self, handle):
+        if not handle:
+            return None
+        now = time.time()
+        with self._lock:
+            item = self._items.get(handle)
+            if item is not None:
+                self._items[handle] = (now, item[1])
+                self._items.move_to_end(handle)
+                return item[1]
+        value = self._unspill(handle, now)
+        if value is not None:
+            with self._lock:
+                self._items[handle] = (now, value)
+                spilled = self._trim(now)
+            for old_handle, old_value in spilled:
+                self._spill(old_handle, old_value)
+        return value
+
+    def _trim(self, now):
+        """Убирает просроченные записи и возвращает вытесненные из памяти."""
+        expired = [handle for handle, (touched, _) in self._items.items() if touched + self.ttl <= now]
+        for handle in expired:
+            del self._items[handle]
+        evicted = []
+        while len(self._items) > self.max_items:
+            evicted.append(self._items.popitem(last=False))
+        return [(handle, value) for handle, (_, value) in evicted]
+
+    def _path(self, handle):
+        return os.path.join(self.spill_dir, '{}.pickle'.format(handle))
+
+    def _spill(self, handle, value):
+        if not self.spill_dir:
+            return
+        try:
+            with open(self._path(handle), 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError:
+            return
+        self._purge_spilled(time.time())
+
+    def _unspill(self, handle, now):
+        if not self.spill_dir or not all(c in '0123456789abcdef' for c in handle):
+            return None
+        path = self._path(handle)
+        try:
+            if os.path.getmtime(path) + self.ttl <= now:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.remove(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return value
+
+    def _purge_spilled(self, now):
+        try:
+            entries = list(os.scandir(self.spill_dir))
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.name.endswith('.pickle') and entry.stat().st_mtime + self.ttl <= now:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+dataset_store = DatasetStore()
@@ -0,0 +1,174 @@
+"""Выгрузка сырых получасовок объекта в CSV или Parquet.
+
+GET /export/intervals.csv?n_ob=...&start=2018-01-01&end=2018-12-31[&n_sh=...&n_sh=...]
+
+Строки читаются из Oracle пачками (cursor.fetchmany) и сразу отдаются
+клиенту частями ответа, поэтому память процесса не зависит от объема
+выгрузки. Parquet пишется группами строк по EXPORT_PARQUET_ROW_GROUP и
+доступен, только если установлен pyarrow.
+
+Каждая выгрузка держит сессию из общего с дашбордом пула Oracle до конца
+скачивания, поэтому одновременных выгрузок в процессе не больше
+EXPORT_MAX_CONCURRENT; сверх этого - 503 с Retry-After.
+"""
+import csv
+from datetime import timedelta
+import io
+import threading
+
+from flask import Blueprint, Response, abort, current_app, request
+from flask_login import current_user, login_required
+import pandas as pd
+
+from webapp.energy import queries
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+blueprint = Blueprint('export', __name__, url_prefix='/export')
+
+
+class StreamSink(io.RawIOBase):
+    """Файл только на запись, из которого записанное забирается кусками."""
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.extend(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ReleasingIterable:
+    """Части ответа; close() (его вызывает WSGI-сервер) освобождает слот выгрузки."""
+
+    def __init__(self, chunks, slots):
+        self.chunks = chunks
+        self.slots = slots
+        self.released = False
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        try:
+            self.chunks.close()
+        finally:
+            if not self.released:
+                self.released = True
+                self.slots.release()
+
+
+def export_slots():
+    slots = current_app.extensions.get('export_slots')
+    if slots is None:
+        limit = current_app.config.get('EXPORT_MAX_CONCURRENT', 2)
+        slots = current_app.extensions.setdefault('export_slots', threading.BoundedSemaphore(limit))
+    return slots
+
+
+def csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(next(batches))
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def parquet_table(schema, rows):
+    meters, dates, intervals, vals = zip(*rows)
+    return pa.Table.from_arrays([
+        pa.array([str(meter) for meter in meters], pa.string()),
+        pa.array(dates, pa.timestamp('s')),
+        pa.array(intervals, pa.int16()),
+        pa.array(vals, pa.float64()),
+    ], schema=schema)
+
+
+def parquet_chunks(batches, row_group_size):
+    next(batches)
+    schema = pa.schema([('N_SH', pa.string()), ('DD_MM_YYYY', pa.timestamp('s')),
+                        ('N_INTER_RAS', pa.int16()), ('VAL', pa.float64())])
+    sink = StreamSink()
+    writer = pq.ParquetWriter(sink, schema)
+    pending = []
+    for rows in batches:
+        pending.extend(rows)
+        if len(pending) >= row_group_size:
+            writer.write_table(parquet_table(schema, pending))
+            pending = []
+            yield sink.drain()
+    if pending:
+        writer.write_table(parquet_table(schema, pending))
+    writer.close()
+    yield sink.drain()
+
+
+def request_day(name):
+    """Дата из параметра запроса; 400, если ее нет или она не разбирается."""
+    value = request.args.get(name, '')
+    try:
+        day = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        abort(400)
+    if pd.isnull(day):
+        abort(400)
+    return day.date()
+
+
+def export_period():
+    """[начало, конец) из параметров start и end (конец включительно)."""
+    date_start = request_day('start')
+    date_end = request_day('end') + timedelta(days=1)
+    max_days = current_app.config.get('EXPORT_MAX_DAYS', 1100)
+    if date_end <= date_start or (date_end - date_start).days > max_days:
+        abort(400)
+    return date_start, date_end
+
+
+@blueprint.route('/intervals.<fmt>')
+@login_required
+def export_intervals(fmt):
+    if fmt not in ('csv', 'parquet') or (fmt == 'parquet' and pq is None):
+        abort(404)
+    n_ob = request.args.get('n_ob', '')
+    if not n_ob or not current_user.can_view(n_ob):
+        abort(403)
+    date_start, date_end = export_period()
+    meters = [meter for meter in request.args.getlist('n_sh') if meter] or None
+    if meters and len(set(meters)) > queries.MAX_IN_LIST:
+        abort(400)
+    slots = export_slots()
+    if not slots.acquire(blocking=False):
+        return Response('Слишком много одновременных выгрузок, повторите позже', status=503,
+                        headers={'Retry-After': '30'}, mimetype='text/plain')
+    batches = queries.iter_intervals(n_ob, date_start, date_end, meters)
+    filename = '{}_{:%Y%m%d}_{:%Y%m%d}.{}'.format(n_ob, date_start, date_end - timedelta(days=1), fmt)
+    if fmt == 'csv':
+        chunks, mimetype = csv_chunks(batches), 'text/csv'
+    else:
+        row_group_size = current_app.config.get('EXPORT_PARQUET_ROW_GROUP', 100000)
+        chunks, mimetype = parquet_chunks(batches, row_group_size), 'application/octet-stream'
+    return Response(ReleasingIterable(chunks, slots), mimetype=mimetype,
+                    headers={'Content-Disposition': 'attachment; filename={}'.format(filename)})
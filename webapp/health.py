@@ -0,0 +1,60 @@
+"""Прогрев процесса перед приемом запросов и проверки /health, /ready.
+
+/health отвечает 200, пока процесс жив. /ready отвечает 200 только после
+успешного warm_up(): пул Oracle создан и выдает сессии, справочники
+загружены, шаблон отчета разобран, layout и зависимости Dash собраны.
+До этого (и при запуске через flask run без прогрева) /ready - 503.
+"""
+import time
+
+from flask import jsonify
+
+state = {'ready': False, 'warmed_at': None, 'warm_up_seconds': None, 'error': None}
+
+
+def warm_up(app):
+    """Прогрев; возвращает True, если процесс готов принимать запросы.
+
+    Без дашборда (create_app(dashboard=False)) прогревать нечего, кроме
+    обработчиков первого запроса.
+    """
+    started = time.perf_counter()
+    extensions = app.extensions
+    try:
+        if 'oracle_pool' in extensions:
+            with extensions['oracle_pool'].connection():
+                pass
+        for name, reference in extensions.get('reference_data', {}).items():
+            reference.snapshot
+            app.logger.info('Справочник %s загружен', name)
+        renderer = extensions.get('report_renderer')
+        if renderer is not None:
+            try:
+                renderer.snapshot()
+            except OSError:
+                app.logger.warning('Шаблон отчета %s недоступен', renderer.template_path)
+        dashapp = extensions.get('dash')
+        with app.test_request_context('/dash/'):
+            app.try_trigger_before_first_request_functions()
+            if dashapp is not None:
+                dashapp.serve_layout()
+                dashapp.dependencies()
+                dashapp.index()
+    except Exception as e:
+        app.logger.exception('Прогрев не удался')
+        state['error'] = repr(e)
+        return False
+    state.update(ready=True, warmed_at=time.time(), error=None,
+                 warm_up_seconds=round(time.perf_counter() - started, 3))
+    app.logger.info('Прогрев завершен за %s с', state['warm_up_seconds'])
+    return True
+
+
+def init_app(app):
+    @app.route('/health')
+    def health():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/ready')
+    def ready():
+        return jsonify(state), 200 if state['ready'] else 503
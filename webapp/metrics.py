@@ -0,0 +1,190 @@
+"""Метрики приложения в текстовом формате Prometheus (/metrics).
+
+Гистограммы времени callback'ов Dash, маршрутов Flask, получения сессии
+Oracle, выполнения запросов и формирования отчетов, плюс счетчики ошибок
+и полученных строк.
+"""
+from contextlib import contextmanager
+from functools import wraps
+import threading
+import time
+
+from flask import Response, g, request
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, escape(value)) for name, value in pairs) + '}'
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self):
+        lines = ['# HELP {} {}'.format(self.name, self.documentation),
+                 '# TYPE {} {}'.format(self.name, self.kind)]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_items(items))
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_items(self, items):
+        for key, value in items:
+            yield '{}{} {}'.format(self.name, format_labels(self.labelnames, key), format_value(value))
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _render_items(self, items):
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield '{}_bucket{} {}'.format(
+                    self.name, format_labels(self.labelnames, key, ('le', format_value(bound))), cumulative)
+            labels = format_labels(self.labelnames, key)
+            yield '{}_sum{} {}'.format(self.name, labels, format_value(total))
+            yield '{}_count{} {}'.format(self.name, labels, count)
+
+
+class Registry:
+
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, *args, **kwargs):
+        metric = Counter(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        metric = Histogram(*args, **kwargs)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+CALLBACK_SECONDS = registry.histogram(
+    'webapp_dash_callback_seconds', 'Время выполнения callback Dash', ['callback'])
+CALLBACK_ERRORS = registry.counter(
+    'webapp_dash_callback_errors_total', 'Ошибки в callback Dash', ['callback'])
+REQUEST_SECONDS = registry.histogram(
+    'webapp_http_request_seconds', 'Время обработки запроса Flask', ['endpoint', 'method', 'status'])
+ORACLE_ACQUIRE_SECONDS = registry.histogram(
+    'webapp_oracle_acquire_seconds', 'Ожидание сессии из пула Oracle')
+ORACLE_ERRORS = registry.counter(
+    'webapp_oracle_errors_total', 'Ошибки Oracle', ['stage'])
+QUERY_SECONDS = registry.histogram(
+    'webapp_oracle_query_seconds', 'Выполнение запроса и выборка строк', ['query'])
+QUERY_ROWS = registry.counter(
+    'webapp_oracle_rows_fetched_total', 'Получено строк из Oracle', ['query'])
+REPORT_SECONDS = registry.histogram(
+    'webapp_report_seconds', 'Формирование xlsx-отчета', ['kind'])
+BACKGROUND_ERRORS = registry.counter(
+    'webapp_background_errors_total', 'Ошибки фоновых задач', ['task'])
+
+
+def timed_callback(name):
+    """Декоратор callback'а Dash: время выполнения и исключения по имени."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                # PreventUpdate - штатный способ ничего не обновлять, не ошибка
+                if type(e).__name__ != 'PreventUpdate':
+                    CALLBACK_ERRORS.inc(callback=name)
+                raise
+            finally:
+                CALLBACK_SECONDS.observe(time.perf_counter() - started, callback=name)
+        return wrapper
+    return decorator
+
+
+def init_app(app):
+    @app.before_request
+    def start_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            endpoint = request.url_rule.rule if request.url_rule is not None else 'unknown'
+            REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                    endpoint=endpoint, method=request.method, status=response.status_code)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,108 @@
+"""Лента новостей постранично.
+
+Страницы выбираются по ключу (published, id), а не через OFFSET: запрос
+следующей страницы идет по индексу ix_news_published_id от последней
+показанной новости, и его стоимость не растет вместе с таблицей. Первая
+страница (ее видит каждый посетитель главной) держится в памяти до
+изменения новостей, но не дольше NEWS_CACHE_TTL секунд - новости могут
+добавляться и из других процессов. Кэш сбрасывается после commit, а не при
+flush: иначе параллельный запрос успел бы снова закэшировать старую
+страницу до фиксации транзакции.
+"""
+from collections import namedtuple
+from datetime import datetime
+from itertools import chain
+import threading
+import time
+
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session
+
+from webapp.news.models import News
+
+NewsItem = namedtuple('NewsItem', ['id', 'title', 'url', 'published', 'text'])
+CURSOR_FORMAT = '%Y%m%d%H%M%S%f'
+
+
+def make_cursor(item):
+    return '{}-{}'.format(item.published.strftime(CURSOR_FORMAT), item.id)
+
+
+def parse_cursor(cursor):
+    """(published, id) из курсора страницы; None, если курсор испорчен."""
+    try:
+        published, news_id = cursor.split('-')
+        return datetime.strptime(published, CURSOR_FORMAT), int(news_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+class NewsFeed:
+
+    def __init__(self, app=None):
+        self.page_size = 10
+        self.ttl = 60
+        self._first_page = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.page_size = app.config.get('NEWS_PAGE_SIZE', self.page_size)
+        self.ttl = app.config.get('NEWS_CACHE_TTL', self.ttl)
+        app.extensions['news_feed'] = self
+
+    def load_page(self, after=None):
+        query = News.query
+        if after is not None:
+            published, news_id = after
+            query = query.filter(or_(News.published < published,
+                                     and_(News.published == published, News.id < news_id)))
+        rows = (query.order_by(News.published.desc(), News.id.desc())
+                .limit(self.page_size + 1).all())
+        items = [NewsItem(row.id, row.title, row.url, row.published, row.text)
+                 for row in rows[:self.page_size]]
+        next_cursor = make_cursor(items[-1]) if len(rows) > self.page_size else None
+        return items, next_cursor
+
+    def page(self, cursor=None):
+        """Страница новостей: (список NewsItem, курсор следующей страницы или None)."""
+        after = parse_cursor(cursor) if cursor else None
+        if after is not None:
+            return self.load_page(after)
+        cached = self._first_page
+        if cached is not None and cached[0] > time.time():
+            return cached[1]
+        generation = self._generation
+        page = self.load_page()
+        with self._lock:
+            # новости изменились, пока читалась страница - ее не кэшируем
+            if generation == self._generation:
+                self._first_page = (time.time() + self.ttl, page)
+        return page
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._first_page = None
+
+
+news_feed = NewsFeed()
+
+
+@event.listens_for(Session, 'after_flush')
+def remember_news_change(session, flush_context):
+    if any(isinstance(item, News) for item in chain(session.new, session.dirty, session.deleted)):
+        session.info['news_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_feed(session):
+    if session.info.pop('news_changed', False):
+        news_feed.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_news_change(session):
+    session.info.pop('news_changed', None)
@@ -8,5 +8,7 @@ class News(db.Model):
     published = db.Column(db.DateTime, nullable=False)
     text = db.Column(db.Text, nullable=True)
 
+    __table_args__ = (db.Index('ix_news_published_id', 'published', 'id'),)
+
     def __repr__(self):
         return '<News {} {}>'.format(self.title, self.url)
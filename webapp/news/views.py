@@ -1,5 +1,5 @@
-from flask import Blueprint, current_app, render_template
-from webapp.news.models import News
+from flask import Blueprint, current_app, render_template, request
+from webapp.news.feed import news_feed
 from webapp.weather import weather_by_city
 
 blueprint = Blueprint('news', __name__)
@@ -9,6 +9,6 @@ blueprint = Blueprint('news', __name__)
 def index():
     page_title = 'Проект АСКУЭ'
     weather = weather_by_city(current_app.config['WEATHER_DEFAULT_CITY'])
-    news_list = News.query.order_by(News.published.desc()).all()
-    return render_template('news/index.html', page_title=page_title, weather=weather, news_list=news_list)
-      
\ No newline at end of file
+    news_list, next_cursor = news_feed.page(request.args.get('after'))
+    return render_template('news/index.html', page_title=page_title, weather=weather,
+                           news_list=news_list, next_cursor=next_cursor)
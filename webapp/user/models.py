@@ -22,6 +22,17 @@ class User(db.Model, UserMixin):
     def is_admin(self):
         return self.role == 'admin'
 
+    def can_view(self, n_ob):
+        """Доступен ли пользователю объект n_ob."""
+        return self.is_admin or str(n_ob) in self.objects
+
+    @property
+    def objects(self):
+        """Номера разрешенных объектов из поля n_ob ('12, 15')."""
+        if not self.n_ob:
+            return frozenset()
+        return frozenset(item.strip() for item in self.n_ob.split(',') if item.strip())
+
     def __repr__(self):
         return '<User {}'.format(self.username)
 
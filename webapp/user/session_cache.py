@@ -0,0 +1,87 @@
+"""Кэш авторизованных пользователей для user_loader.
+
+Dash на каждое действие на странице шлет несколько запросов к callback'ам,
+и каждый из них раньше загружал пользователя из БД. Здесь хранится легкая
+копия пользователя (роль и разобранный набор разрешенных объектов) на
+USER_CACHE_TTL секунд. Запись сбрасывается, когда пользователь меняется
+или удаляется через SQLAlchemy; в других процессах она устареет не позже
+чем через USER_CACHE_TTL.
+"""
+import threading
+import time
+
+from flask_login import UserMixin
+from sqlalchemy import event
+
+from webapp.user.models import User
+
+
+class CachedUser(UserMixin):
+    """Неизменяемая копия User, не привязанная к сессии SQLAlchemy."""
+
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.role = user.role
+        self.n_ob = user.n_ob
+        self.objects = user.objects
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def can_view(self, n_ob):
+        """Доступен ли пользователю объект n_ob."""
+        return self.is_admin or str(n_ob) in self.objects
+
+    def __repr__(self):
+        return '<CachedUser {}>'.format(self.username)
+
+
+class UserCache:
+
+    def __init__(self, app=None):
+        self.ttl = 300
+        self._items = {}
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        app.extensions['user_cache'] = self
+
+    def get(self, user_id):
+        """Пользователь по id (строка из сессии); None, если его нет."""
+        key = str(user_id)
+        now = time.time()
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and item[0] > now:
+                return item[1]
+        user = User.query.get(int(key)) if key.isdigit() else None
+        if user is None:
+            self.invalidate(key)
+            return None
+        cached = CachedUser(user)
+        with self._lock:
+            self._items[key] = (now + self.ttl, cached)
+        return cached
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._items.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+user_cache = UserCache()
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_user(mapper, connection, target):
+    user_cache.invalidate(target.id)
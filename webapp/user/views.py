@@ -2,7 +2,7 @@ from flask import Blueprint, flash, redirect, url_for, render_template, g
 from flask_login import current_user, login_user, logout_user
 from webapp.user.forms import LoginForm, RegistrationForm
 from webapp.user.models import User
-from webapp import db
+from webapp.db import db
 
 blueprint = Blueprint('user', __name__, url_prefix='/users')
 
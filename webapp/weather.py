@@ -1,17 +1,35 @@
-from flask import current_app
+"""Погода для главной страницы.
+
+Погода по городам из WEATHER_CITIES (по умолчанию только
+WEATHER_DEFAULT_CITY) запрашивается в фоне раз в WEATHER_REFRESH_INTERVAL
+секунд через одну requests.Session с пулом соединений и таймаутами
+WEATHER_TIMEOUT. Страница берет только последнее полученное значение и не
+ждет сервис погоды; если он недоступен дольше WEATHER_MAX_AGE секунд,
+погода не показывается.
+"""
+import logging
+import threading
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
 
-def weather_by_city(city_name):
-    weather_url = current_app.config['WEATHER_URL'] 
+from webapp.metrics import BACKGROUND_ERRORS
+
+logger = logging.getLogger(__name__)
+
+
+def fetch_weather(session, url, api_key, city_name, timeout):
+    """Текущая погода в городе (current_condition) или False."""
     params = {
-        'key': current_app.config['WEATHER_API_KEY'],
+        'key': api_key,
         'q': city_name,
         'format': 'json',
         'num_of_days': 1,
         'lang': 'ru'
     }
     try:
-        result = requests.get(weather_url, params=params)
+        result = session.get(url, params=params, timeout=timeout)
         result.raise_for_status()
         weather = result.json()
         if 'data' in weather:
@@ -21,10 +39,76 @@ def weather_by_city(city_name):
                 except(IndexError, TypeError):
                     return False
     except(requests.RequestException, ValueError):
-        print('Сетевая ошибка')
+        logger.warning('Сетевая ошибка при запросе погоды для %s', city_name)
         return False
     return False
 
-if __name__ == '__main__':
-    print(weather_by_city('Saint-Petersburg,Russia'))
-    
\ No newline at end of file
+
+class WeatherCache:
+
+    def __init__(self, app=None):
+        self.url = None
+        self.api_key = None
+        self.cities = ()
+        self.interval = 600
+        self.timeout = (3.05, 5)
+        self.max_age = 3 * 3600
+        self.session = None
+        self._values = {}
+        self._thread = None
+        self._logger = logger
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.url = config.get('WEATHER_URL')
+        self.api_key = config.get('WEATHER_API_KEY')
+        default_city = config.get('WEATHER_DEFAULT_CITY')
+        self.cities = tuple(config.get('WEATHER_CITIES', [default_city] if default_city else []))
+        self.interval = config.get('WEATHER_REFRESH_INTERVAL', self.interval)
+        self.timeout = config.get('WEATHER_TIMEOUT', self.timeout)
+        self.max_age = config.get('WEATHER_MAX_AGE', self.max_age)
+        self._logger = app.logger
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(len(self.cities), 1))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        app.extensions['weather'] = self
+
+    def refresh(self, city_name):
+        weather = fetch_weather(self.session, self.url, self.api_key, city_name, self.timeout)
+        if weather:
+            self._values[city_name] = (time.time(), weather)
+        return weather
+
+    def get(self, city_name):
+        """Последняя полученная погода в городе или False; в сеть не ходит."""
+        item = self._values.get(city_name)
+        if item is None or time.time() - item[0] > self.max_age:
+            return False
+        return item[1]
+
+    def start(self):
+        """Фоновое обновление: сразу и далее каждые interval секунд."""
+        if self._thread is not None or not self.url:
+            return
+        self._thread = threading.Thread(target=self._run, name='refresh-weather', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            for city_name in self.cities:
+                try:
+                    self.refresh(city_name)
+                except Exception:
+                    self._logger.exception('Не удалось обновить погоду для %s', city_name)
+                    BACKGROUND_ERRORS.inc(task='refresh-weather')
+            time.sleep(self.interval)
+
+
+weather_cache = WeatherCache()
+
+
+def weather_by_city(city_name):
+    return weather_cache.get(city_name)